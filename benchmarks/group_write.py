@@ -0,0 +1,61 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+
+from src.inventory_generator import InventoryGenerator
+
+
+def make_hosts(count: int, groups: int) -> dict:
+    hosts = {}
+    for i in range(count):
+        hostname = f"srv-{i}"
+        hosts[hostname] = {
+            'ansible_host': f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            'ansible_user': 'root',
+            'ansible_port': 11041,
+            'server_name': hostname,
+            'status': 'Active',
+            'os_name': 'Ubuntu 22.04',
+            'host_provider': 'Hetzner',
+            'location': 'DE',
+            'group': f"group-{i % groups}",
+        }
+    return hosts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group files render-and-write benchmark")
+    parser.add_argument("--hosts", type=int, default=20000)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--workers", default="1,2,4,8,16", help="Числа потоков через запятую")
+    parser.add_argument("--path", help="Каталог на проверяемом хранилище (по умолчанию временный)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logger.remove()
+    hosts = make_hosts(args.hosts, args.groups)
+    base_path = tempfile.mkdtemp(dir=args.path)
+
+    try:
+        print(f"hosts: {args.hosts}, groups: {args.groups}, path: {base_path}")
+        for workers in (int(w) for w in args.workers.split(',')):
+            generator = InventoryGenerator(base_path, write_workers=workers)
+            timings = []
+            for _ in range(args.repeat):
+                started = time.monotonic()
+                generator.write_group_files(hosts)
+                timings.append((time.monotonic() - started) * 1000)
+            print(f"workers {workers:>3}: best {min(timings):8.1f} ms, avg {sum(timings) / len(timings):8.1f} ms")
+    finally:
+        shutil.rmtree(base_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые не должны загружаться в легких режимах CLI
+HEAVY_MODULES = ["requests", "yaml", "src.monitor", "src.inventory_generator"]
+
+BENCH_ENV = {
+    "AIRTABLE_API_KEY": "bench",
+    "AIRTABLE_BASE_ID": "bench",
+    "TELEGRAM_ENABLED": "false",
+}
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.update(BENCH_ENV)
+    return env
+
+
+def measure_import_us(module: str) -> int:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"No importtime data for {module}")
+
+
+def measure_mode_ms(args: list) -> float:
+    code = "import time, sys; t = time.perf_counter(); sys.argv = ['main.py'] + %r; import main; main.main(); " \
+           "sys.stderr.write('%%f\\n' %% ((time.perf_counter() - t) * 1000))" % (args,)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    return float(result.stderr.strip().splitlines()[-1])
+
+
+def loaded_heavy_modules(args: list) -> list:
+    code = "import sys; sys.argv = ['main.py'] + %r; import main; main.main(); " \
+           "print(','.join(m for m in %r if m in sys.modules))" % (args, HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    line = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+    return [m for m in line.split(",") if m in HEAVY_MODULES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the CLI")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="Максимальное время `main.py --config-check` (медиана)")
+    args = parser.parse_args()
+
+    failed = False
+
+    for module in ["src.config", "main", "src.airtable_client", "src.monitor"]:
+        samples = [measure_import_us(module) for _ in range(args.runs)]
+        print(f"import {module:<22} {statistics.median(samples) / 1000:8.1f} ms")
+
+    config_check_ms = statistics.median(measure_mode_ms(["--config-check"]) for _ in range(args.runs))
+    print(f"main.py --config-check      {config_check_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if config_check_ms > args.budget_ms:
+        print("FAIL: --config-check exceeded the startup budget")
+        failed = True
+
+    heavy = loaded_heavy_modules(["--config-check"])
+    if heavy:
+        print(f"FAIL: --config-check imported heavy modules: {', '.join(heavy)}")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
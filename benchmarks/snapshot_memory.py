@@ -0,0 +1,105 @@
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.snapshot import SnapshotBuilder
+
+
+GROUPS = ['3X-UI', 'Remnawave-nodes', 'Monitoring', 'Databases', 'Web']
+LOCATIONS = ['Germany', 'Finland', 'Netherlands', 'Russia', 'United States']
+STATUSES = ['New', 'Active', 'Maintenance']
+OS_NAMES = ['Ubuntu 22.04', 'Debian 12', 'AlmaLinux 9']
+PROVIDERS = ['Hetzner', 'Aeza', 'DigitalOcean', 'OVH']
+
+
+def make_page(start: int, size: int) -> list:
+    rng = random.Random(start)
+    records = []
+    for i in range(start, start + size):
+        records.append({
+            'id': f"rec{i:014d}",
+            'createdTime': '2024-01-01T00:00:00.000Z',
+            'fields': {
+                'Server name': f"srv-{i}",
+                'Server IP': f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                'User': rng.choice(['root', 'ansible']),
+                'Password': f"pw-{rng.getrandbits(64):016x}",
+                'Status': rng.choice(STATUSES),
+                'OS Name': rng.choice(OS_NAMES),
+                'Location': rng.choice(LOCATIONS),
+                'Group': rng.choice(GROUPS),
+                'Host provider': rng.choice(PROVIDERS),
+                'Notes': f"Rack {rng.randint(1, 40)}, contract {rng.getrandbits(32):08x}",
+                'Billing': {'price': rng.randint(3, 90), 'currency': 'EUR'},
+                'Tags': ['vpn', 'prod'] if i % 2 else ['internal'],
+                'Created': '2024-01-01',
+                'Owner': f"team-{rng.randint(1, 12)}",
+            }
+        })
+    # Как и при чтении ответа API, каждая страница - свежие объекты из JSON
+    return json.loads(json.dumps(records))
+
+
+def iter_records(count: int, page_size: int = 100):
+    for start in range(0, count, page_size):
+        yield from make_page(start, min(page_size, count - start))
+
+
+def retained_raw(count: int) -> dict:
+    servers = {}
+    for record in iter_records(count):
+        fields = record.get('fields', {})
+        servers[fields['Server name']] = {'id': record.get('id'), 'fields': fields}
+    return servers
+
+
+def retained_compact(count: int) -> dict:
+    snapshot = SnapshotBuilder()
+    snapshot.add_table('Servers', iter_records(count))
+    return snapshot.servers
+
+
+def retained_steady(count: int) -> dict:
+    # Состояние монитора после второго такта без изменений: last-known-good таблицы и индекс серверов
+    previous = SnapshotBuilder()
+    table_snapshot = previous.add_table('Servers', iter_records(count))
+    current = SnapshotBuilder()
+    table_snapshot = current.add_table('Servers', iter_records(count), previous=table_snapshot)
+    return {'table_snapshots': {'Servers': table_snapshot}, 'last_servers_data': previous.servers}
+
+
+def measure(build, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build(count)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retained snapshot memory benchmark")
+    parser.add_argument("--records", type=int, default=50000)
+    args = parser.parse_args()
+
+    raw = measure(retained_raw, args.records)
+    compact = measure(retained_compact, args.records)
+    steady = measure(retained_steady, args.records)
+
+    print(f"records:            {args.records}")
+    print(f"raw fields dicts:   {raw / 1024 / 1024:8.1f} MiB")
+    print(f"compact rows:       {compact / 1024 / 1024:8.1f} MiB")
+    print(f"ratio:              {raw / compact:8.1f}x")
+    print(f"monitor, 2nd tact:  {steady / 1024 / 1024:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,143 @@
 import sys
 import argparse
+from datetime import datetime
 from loguru import logger
 
-from src.monitor import AirtableMonitor
+from src.config import Config
+from src.logging_setup import setup_logging
+
+
+def run_connection_test(config: Config) -> bool:
+    from src.airtable_client import AirtableClient
+    
+    logger.info("Testing Airtable connection...")
+    airtable = AirtableClient.from_config(config)
+    airtable_success = airtable.test_connection()
+    
+    if airtable_success:
+        logger.info("Airtable connection successful")
+        for table_name in config.AIRTABLE_TABLES:
+            try:
+                record_count = sum(1 for _ in airtable.iter_records(table_name))
+                logger.info(f"Table {table_name}: {record_count} records")
+            except Exception as e:
+                logger.warning(f"Error getting data from table {table_name}: {e}")
+    else:
+        logger.error("Airtable connection error")
+    
+    telegram_success = True
+    if config.TELEGRAM_ENABLED:
+        from src.telegram_notifier import TelegramNotifier
+        
+        logger.info("Testing Telegram connection...")
+        telegram_success = TelegramNotifier.from_config(config).test_connection()
+        if not telegram_success:
+            logger.error("Telegram connection error")
+    
+    return airtable_success and telegram_success
+
+def run_history(args, configs: list):
+    import json
+    from src.journal import ChangeJournal, parse_since
+    
+    since = parse_since(args.since) if args.since else None
+    selected = [c for c in configs if not args.monitor or c.NAME == args.monitor]
+    if not selected:
+        raise ValueError(f"Unknown monitor: {args.monitor}")
+    
+    for monitor_config in selected:
+        journal = ChangeJournal(monitor_config.JOURNAL_PATH)
+        entries = journal.query(server=args.host, group=args.group, since=since, limit=args.limit)
+        journal.close()
+        
+        if args.json:
+            for entry in entries:
+                entry['monitor'] = monitor_config.NAME
+                print(json.dumps(entry, ensure_ascii=False))
+            continue
+        
+        prefix = f"[{monitor_config.NAME}] " if len(selected) > 1 else ""
+        for entry in entries:
+            timestamp = datetime.fromtimestamp(entry['ts']).strftime('%Y-%m-%d %H:%M:%S')
+            line = f"{prefix}{timestamp} | {entry['change_type']:<8} | {entry['server_name']}"
+            if entry['group_name']:
+                line += f" ({entry['group_name']})"
+            if entry['field']:
+                line += f" | {entry['field']}: {entry['old_value'] or '-'} -> {entry['new_value'] or '-'}"
+            print(line)
+
+
+def load_mirror_hosts(configs: list, monitor_name=None) -> dict:
+    from src.inventory_generator import InventoryGenerator
+    from src.mirror import InventoryMirror
+    
+    selected = [c for c in configs if not monitor_name or c.NAME == monitor_name]
+    if not selected:
+        raise ValueError(f"Unknown monitor: {monitor_name}")
+    
+    hosts = {}
+    for monitor_config in selected:
+        mirror = InventoryMirror(monitor_config.MIRROR_PATH)
+        if not mirror.exists():
+            logger.warning(f"No mirror at {monitor_config.MIRROR_PATH}, run the monitor first")
+            continue
+        
+        state = mirror.load_state()
+        servers = mirror.load_servers(monitor_config.AIRTABLE_TABLES)
+        mirror.close()
+        if state.get('stale'):
+            logger.warning(f"Mirror of {monitor_config.NAME} is stale since "
+                           f"{datetime.fromtimestamp(state['stale_since']).strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        generator = InventoryGenerator(monitor_config.ANSIBLE_INVENTORY_PATH)
+        hosts.update(generator.normalize_hosts(row.to_record() for row in servers.values()))
+    return hosts
+
+
+def run_query(args, configs: list):
+    import json
+    from src.host_query import HostIndex, parse_predicate
+    
+    predicates = [parse_predicate(expression) for expression in args.where]
+    hosts = load_mirror_hosts(configs, args.monitor)
+    
+    index = HostIndex(hosts)
+    matched = index.select(predicates)
+    
+    if args.format == "json":
+        result = {}
+        for hostname in matched:
+            result[hostname] = {k: v for k, v in hosts[hostname].items() if k != 'ansible_password'}
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.format == "limit":
+        print(",".join(matched))
+    else:
+        for hostname in matched:
+            print(hostname)
+
+
+def run_dynamic_inventory(args, configs: list):
+    import json
+    from src.inventory_generator import InventoryGenerator
+    
+    # Логи в stderr не должны смешиваться с JSON, который читает Ansible
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    
+    hosts = load_mirror_hosts(configs, args.monitor)
+    if args.host:
+        print(json.dumps(hosts.get(args.host, {}), ensure_ascii=False))
+        return
+    
+    # Настройки групп по измерениям общие из окружения, если монитор не указан явно
+    monitor_config = next((c for c in configs if c.NAME == args.monitor), configs[0])
+    generator = InventoryGenerator(
+        monitor_config.ANSIBLE_INVENTORY_PATH,
+        group_dimensions=monitor_config.INVENTORY_GROUP_DIMENSIONS,
+        group_combinations=monitor_config.INVENTORY_GROUP_COMBINATIONS
+    )
+    print(json.dumps(generator.build_dynamic_inventory(hosts), ensure_ascii=False, indent=2))
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -26,43 +161,80 @@ def main():
         help="Проверить конфигурацию и показать настройки"
     )
     
+    subparsers = parser.add_subparsers(dest="command")
+    
+    history_parser = subparsers.add_parser("history", help="Показать журнал изменений серверов")
+    history_parser.add_argument("--host", help="Имя сервера (Server name)")
+    history_parser.add_argument("--group", help="Группа сервера")
+    history_parser.add_argument("--since", help="Начиная с момента: 30m, 2h, 7d или ISO дата")
+    history_parser.add_argument("--limit", type=int, default=100, help="Максимум записей")
+    history_parser.add_argument("--json", action="store_true", help="Вывод в JSON")
+    history_parser.add_argument("--monitor", help="Имя монитора из MONITORS_FILE")
+    
+    query_parser = subparsers.add_parser("query", help="Найти хосты в локальном снимке без запросов к Airtable")
+    query_parser.add_argument("--where", action="append", default=[], metavar="FIELD=VALUE",
+                              help="Условие: FIELD=VALUE, FIELD!=VALUE или FIELD~TEXT (можно несколько)")
+    query_parser.add_argument("--format", choices=["names", "limit", "json"], default="names",
+                              help="names - по строке на хост, limit - строка для ansible --limit, json")
+    query_parser.add_argument("--monitor", help="Имя монитора из MONITORS_FILE")
+    
+    inventory_parser = subparsers.add_parser("inventory", help="Динамический inventory для Ansible из локального зеркала")
+    inventory_mode = inventory_parser.add_mutually_exclusive_group(required=True)
+    inventory_mode.add_argument("--list", action="store_true", help="Все группы и hostvars в формате JSON")
+    inventory_mode.add_argument("--host", help="Переменные одного хоста")
+    inventory_parser.add_argument("--monitor", help="Имя монитора из MONITORS_FILE")
+    
     args = parser.parse_args()
     
     try:
-        monitor = AirtableMonitor()
+        config = Config()
+        configs = config.monitor_configs()
+        
+        if args.command == "history":
+            run_history(args, configs)
+            return
+        
+        if args.command == "query":
+            run_query(args, configs)
+            return
+        
+        if args.command == "inventory":
+            run_dynamic_inventory(args, configs)
+            return
+        
+        for monitor_config in configs:
+            monitor_config.validate()
+        
+        continuous = not (args.config_check or args.test or args.once)
+        setup_logging(config, background=continuous)
         
         if args.config_check:
             logger.info("Configuration loaded successfully")
-            logger.info(f"Tables for monitoring: {monitor.config.AIRTABLE_TABLES}")
-            logger.info(f"Inventory path: {monitor.config.ANSIBLE_INVENTORY_PATH}")
-            logger.info(f"Check interval: {monitor.config.POLLING_INTERVAL} seconds")
-            logger.info(f"Monitoring enabled: {monitor.config.POLLING_ENABLED}")
+            for monitor_config in configs:
+                if len(configs) > 1:
+                    logger.info(f"Monitor: {monitor_config.NAME} (base {monitor_config.AIRTABLE_BASE_ID})")
+                logger.info(f"Tables for monitoring: {monitor_config.AIRTABLE_TABLES}")
+                logger.info(f"Inventory path: {monitor_config.ANSIBLE_INVENTORY_PATH}")
+                logger.info(f"Check interval: {monitor_config.POLLING_INTERVAL} seconds")
+                logger.info(f"Monitoring enabled: {monitor_config.POLLING_ENABLED}")
             return
         
         if args.test:
-            logger.info("Testing Airtable connection...")
-            success = monitor.test_connection()
-            if success:
-                logger.info("Airtable connection successful")
-                
-                for table_name in monitor.config.AIRTABLE_TABLES:
-                    try:
-                        records = monitor.airtable.get_all_records_from_tables([table_name])
-                        record_count = len(records.get(table_name, []))
-                        logger.info(f"Table {table_name}: {record_count} records")
-                    except Exception as e:
-                        logger.warning(f"Error getting data from table {table_name}: {e}")
-            else:
-                logger.error("Airtable connection error")
+            # Проверяются все мониторы; код выхода нужен cron и оберткам Ansible
+            results = [run_connection_test(monitor_config) for monitor_config in configs]
+            if not all(results):
+                sys.exit(1)
             return
         
+        from src.scheduler import MonitorScheduler
+        scheduler = MonitorScheduler.from_configs(configs, config)
+        
         if args.once:
-            logger.info("Running single check...")
-            monitor.run_single_check(1)
+            scheduler.run_once()
         else:
             logger.info("Starting continuous monitoring...")
             logger.info("Press Ctrl+C to stop")
-            monitor.start_monitoring()
+            scheduler.run()
             
     except KeyboardInterrupt:
         logger.info("Stop signal received")
@@ -1,14 +1,19 @@
-import requests
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 from loguru import logger
 
+from src.rate_limiter import RateLimiter
+
 
 class AirtableClient:
     
-    def __init__(self, api_key: str, base_id: str, table_name: str):
+    def __init__(self, api_key: str, base_id: str, table_name: str,
+                 session=None, rate_limiter: Optional[RateLimiter] = None, timeout: float = 30):
         self.api_key = api_key
         self.base_id = base_id
         self.table_name = table_name
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
         self.base_url = f"https://api.airtable.com/v0/{base_id}/{table_name}"
         
         self.headers = {
@@ -16,45 +21,57 @@ class AirtableClient:
             "Content-Type": "application/json"
         }
     
-    def get_all_records(self) -> List[Dict]:
-        try:
-            records = []
-            url = self.base_url
+    @classmethod
+    def from_config(cls, config, session=None, rate_limiter: Optional[RateLimiter] = None) -> "AirtableClient":
+        return cls(config.AIRTABLE_API_KEY, config.AIRTABLE_BASE_ID, config.AIRTABLE_TABLES[0],
+                   session=session, rate_limiter=rate_limiter, timeout=config.AIRTABLE_TIMEOUT)
+    
+    def _get(self, url: str, **kwargs):
+        import requests
+        
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        
+        http = self.session or requests
+        kwargs.setdefault('timeout', self.timeout)
+        return http.get(url, headers=self.headers, **kwargs)
+    
+    def _table_url(self, table_name: Optional[str] = None) -> str:
+        if table_name is None:
+            return self.base_url
+        return f"https://api.airtable.com/v0/{self.base_id}/{table_name}"
+    
+    def iter_pages(self, table_name: Optional[str] = None) -> Iterator[List[Dict]]:
+        base_url = self._table_url(table_name)
+        url = base_url
+        
+        while url:
+            response = self._get(url)
+            response.raise_for_status()
             
-            while url:
-                response = requests.get(url, headers=self.headers)
-                response.raise_for_status()
-                
-                data = response.json()
-                records.extend(data.get('records', []))
-                url = data.get('offset') and f"{self.base_url}?offset={data['offset']}"
-                
-            logger.info(f"Получено {len(records)} записей из таблицы {self.table_name}")
+            data = response.json()
+            yield data.get('records', [])
+            url = data.get('offset') and f"{base_url}?offset={data['offset']}"
+    
+    def iter_records(self, table_name: Optional[str] = None) -> Iterator[Dict]:
+        for page in self.iter_pages(table_name):
+            yield from page
+    
+    def get_all_records(self, table_name: Optional[str] = None) -> List[Dict]:
+        import requests
+        
+        try:
+            records = list(self.iter_records(table_name))
+            logger.debug(f"Получено {len(records)} записей из таблицы {table_name or self.table_name}")
             return records
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Ошибка при получении данных из Airtable: {e}")
             raise
     
-    def get_all_records_from_tables(self, table_names: List[str]) -> Dict[str, List[Dict]]:
-        all_records = {}
-        
-        for table_name in table_names:
-            try:
-                temp_client = AirtableClient(self.api_key, self.base_id, table_name)
-                records = temp_client.get_all_records()
-                all_records[table_name] = records
-                logger.info(f"Таблица {table_name}: {len(records)} записей")
-                
-            except Exception as e:
-                logger.error(f"Ошибка получения данных из таблицы {table_name}: {e}")
-                all_records[table_name] = []
-        
-        return all_records
-    
     def test_connection(self) -> bool:
         try:
-            response = requests.get(self.base_url, headers=self.headers, params={"maxRecords": 1})
+            response = self._get(self.base_url, params={"maxRecords": 1})
             response.raise_for_status()
             return True
         except Exception as e:
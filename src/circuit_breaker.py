@@ -0,0 +1,44 @@
+import time
+
+
+class CircuitBreaker:
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 1, base_delay: float = 5, max_delay: float = 300):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self.retry_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if time.monotonic() >= self.retry_at:
+            # Одна пробная попытка; при неудаче задержка удваивается
+            self.state = self.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self.retry_at = 0.0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            delay = min(self.max_delay, self.base_delay * (2 ** self.opened_count))
+            self.opened_count += 1
+            self.state = self.OPEN
+            self.retry_at = time.monotonic() + delay
+
+    def retry_in(self) -> float:
+        return max(0.0, self.retry_at - time.monotonic())
@@ -1,42 +1,186 @@
 import os
-from dotenv import load_dotenv
+from typing import Dict, List, Optional
 
-load_dotenv()
+
+def file_mtime(path: Optional[str]) -> Optional[float]:
+    if not path:
+        return None
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
 
 
 class Config:
-    
-    AIRTABLE_API_KEY = os.getenv('AIRTABLE_API_KEY')
-    AIRTABLE_BASE_ID = os.getenv('AIRTABLE_BASE_ID')
-    AIRTABLE_TABLE_NAME = os.getenv('AIRTABLE_TABLE_NAME', 'Table%201')
-    
-    AIRTABLE_TABLES = os.getenv('AIRTABLE_TABLES', '').split(',') if os.getenv('AIRTABLE_TABLES') else [AIRTABLE_TABLE_NAME]
-    AIRTABLE_TABLES = [table.strip() for table in AIRTABLE_TABLES if table.strip()]
-    
-    POLLING_INTERVAL = int(os.getenv('POLLING_INTERVAL', 2))
-    POLLING_ENABLED = os.getenv('POLLING_ENABLED', 'true').lower() == 'true'
-    
-    ALERT_TACTS_TIMEOUT = int(os.getenv('ALERT_TACTS_TIMEOUT', 5))
-    
-    ANSIBLE_INVENTORY_PATH = os.getenv('ANSIBLE_INVENTORY_PATH', '/etc/ansible-airtable')
-    ANSIBLE_INVENTORY_FORMAT = os.getenv('ANSIBLE_INVENTORY_FORMAT', 'yaml')
-    
-    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
-    LOG_FILE = os.getenv('LOG_FILE', 'airtable_monitor.log')
-    
-    TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
-    TELEGRAM_TOPIC_ID = os.getenv('TELEGRAM_TOPIC_ID')
-    TELEGRAM_ENABLED = os.getenv('TELEGRAM_ENABLED', 'false').lower() == 'true'
-    
+
+    def __init__(self, overrides: Optional[Dict] = None, env: Optional[Dict] = None):
+        self._env = env if env is not None else self.load_environment()
+        self._overrides = {key: self._stringify(value) for key, value in (overrides or {}).items()
+                           if value is not None}
+
+        self.NAME = self._get('NAME', 'default')
+        self.MONITORS_FILE = self._get('MONITORS_FILE')
+
+        self.AIRTABLE_API_KEY = self._get('AIRTABLE_API_KEY')
+        self.AIRTABLE_BASE_ID = self._get('AIRTABLE_BASE_ID')
+        self.AIRTABLE_TABLE_NAME = self._get('AIRTABLE_TABLE_NAME', 'Table%201')
+        self.AIRTABLE_RATE_LIMIT = float(self._get('AIRTABLE_RATE_LIMIT', 5))
+        self.AIRTABLE_TIMEOUT = float(self._get('AIRTABLE_TIMEOUT', 30))
+
+        self.CIRCUIT_FAILURE_THRESHOLD = int(self._get('CIRCUIT_FAILURE_THRESHOLD', 1))
+        self.CIRCUIT_BACKOFF_BASE = float(self._get('CIRCUIT_BACKOFF_BASE', 5))
+        self.CIRCUIT_BACKOFF_MAX = float(self._get('CIRCUIT_BACKOFF_MAX', 300))
+
+        tables = self._get('AIRTABLE_TABLES', '').split(',') if self._get('AIRTABLE_TABLES') else [self.AIRTABLE_TABLE_NAME]
+        self.AIRTABLE_TABLES = [table.strip() for table in tables if table.strip()]
+
+        self.POLLING_INTERVAL = int(self._get('POLLING_INTERVAL', 2))
+        self.POLLING_ENABLED = self._get('POLLING_ENABLED', 'true').lower() == 'true'
+
+        self.ALERT_TACTS_TIMEOUT = int(self._get('ALERT_TACTS_TIMEOUT', 5))
+
+        self.ANSIBLE_INVENTORY_PATH = self._get('ANSIBLE_INVENTORY_PATH', '/etc/ansible-airtable')
+        self.ANSIBLE_INVENTORY_FORMAT = self._get('ANSIBLE_INVENTORY_FORMAT', 'yaml')
+
+        self.INVENTORY_WRITE_WORKERS = int(self._get('INVENTORY_WRITE_WORKERS', 1))
+        self.VIEWS_FILE = self._get('VIEWS_FILE')
+
+        self.INVENTORY_GROUP_DIMENSIONS = self._get_list('INVENTORY_GROUP_DIMENSIONS')
+        self.INVENTORY_GROUP_COMBINATIONS = [
+            [dimension.strip() for dimension in combination.split('+') if dimension.strip()]
+            for combination in self._get_list('INVENTORY_GROUP_COMBINATIONS')
+        ]
+
+        self.PROBE_ENABLED = self._get('PROBE_ENABLED', 'false').lower() == 'true'
+        self.PROBE_TIMEOUT = float(self._get('PROBE_TIMEOUT', 2))
+        self.PROBE_CONCURRENCY = int(self._get('PROBE_CONCURRENCY', 200))
+        self.PROBE_RETRY_INTERVAL = float(self._get('PROBE_RETRY_INTERVAL', 60))
+
+        self.JOURNAL_ENABLED = self._get('JOURNAL_ENABLED', 'true').lower() == 'true'
+        self.JOURNAL_PATH = self._get('JOURNAL_PATH') or os.path.join(self.ANSIBLE_INVENTORY_PATH, '.changes.sqlite')
+        self.JOURNAL_RETENTION_DAYS = int(self._get('JOURNAL_RETENTION_DAYS', 90))
+        self.JOURNAL_COMPACT_INTERVAL = int(self._get('JOURNAL_COMPACT_INTERVAL', 3600))
+
+        self.MIRROR_PATH = self._get('MIRROR_PATH') or os.path.join(self.ANSIBLE_INVENTORY_PATH, '.mirror.sqlite')
+        self.MIRROR_INDEX_FIELDS = self._get_list('MIRROR_INDEX_FIELDS', 'Status,Location')
+
+        self.HOOKS_FILE = self._get('HOOKS_FILE')
+        self.HOOKS_TIMEOUT = float(self._get('HOOKS_TIMEOUT', 300))
+        self.HOOKS_MAX_WORKERS = int(self._get('HOOKS_MAX_WORKERS', 2))
+        self.HOOKS_DEBOUNCE_SECONDS = float(self._get('HOOKS_DEBOUNCE_SECONDS', 10))
+
+        self.HA_ENABLED = self._get('HA_ENABLED', 'false').lower() == 'true'
+        self.HA_LEASE_PATH = self._get('HA_LEASE_PATH') or os.path.join(self.ANSIBLE_INVENTORY_PATH, '.leader.lease')
+        self.HA_LEASE_TTL = float(self._get('HA_LEASE_TTL', 60))
+        self.HA_NODE_ID = self._get('HA_NODE_ID')
+
+        self.LOG_LEVEL = self._get('LOG_LEVEL', 'INFO')
+        self.LOG_FILE = self._get('LOG_FILE', 'airtable_monitor.log')
+        self.LOG_FILE_ENABLED = self._get('LOG_FILE_ENABLED', 'false').lower() == 'true'
+        self.LOG_FILE_ROTATION = self._get('LOG_FILE_ROTATION', '10 MB')
+        self.LOG_FILE_RETENTION = self._get('LOG_FILE_RETENTION', '5')
+        self.LOG_IDLE_SUMMARY_TACTS = int(self._get('LOG_IDLE_SUMMARY_TACTS', 30))
+
+        self.TELEGRAM_BOT_TOKEN = self._get('TELEGRAM_BOT_TOKEN')
+        self.TELEGRAM_CHAT_ID = self._get('TELEGRAM_CHAT_ID')
+        self.TELEGRAM_TOPIC_ID = self._get('TELEGRAM_TOPIC_ID')
+        self.TELEGRAM_ENABLED = self._get('TELEGRAM_ENABLED', 'false').lower() == 'true'
+
+    # Значения .env на момент запуска процесса
+    _initial_dotenv: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def load_environment(cls) -> Dict[str, str]:
+        from dotenv import dotenv_values, find_dotenv
+
+        # .env перечитывается при каждом вызове (горячая перезагрузка), переменные процесса важнее файла
+        dotenv_path = find_dotenv()
+        dotenv = {key: value for key, value in dotenv_values(dotenv_path).items() if value is not None}
+        if cls._initial_dotenv is None:
+            cls._initial_dotenv = dict(dotenv)
+
+        env = dict(dotenv)
+        env.update(os.environ)
+        # Ключи, измененные в .env после запуска, важнее переменных процесса: иначе правка файла
+        # не действует, когда те же ключи переданы через environment (docker-compose)
+        env.update({key: value for key, value in dotenv.items() if cls._initial_dotenv.get(key) != value})
+        env['_DOTENV_PATH'] = dotenv_path
+        return env
+
+    def watched_files(self) -> List[str]:
+        files = [self._env.get('_DOTENV_PATH'), self.MONITORS_FILE, self.VIEWS_FILE, self.HOOKS_FILE]
+        return [path for path in files if path]
+
+    def values(self) -> Dict:
+        return {key: value for key, value in vars(self).items() if key.isupper()}
+
+    @staticmethod
+    def _stringify(value) -> str:
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, (list, tuple)):
+            return ','.join(str(item) for item in value)
+        return str(value)
+
+    def _get(self, key: str, default=None):
+        if key in self._overrides:
+            return self._overrides[key]
+        return self._env.get(key, default)
+
+    def _get_list(self, key: str, default: str = '') -> List[str]:
+        return [item.strip() for item in self._get(key, default).split(',') if item.strip()]
+
+    def monitor_configs(self) -> List["Config"]:
+        if not self.MONITORS_FILE:
+            return [self]
+
+        import yaml
+
+        with open(self.MONITORS_FILE, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+
+        entries = data.get('monitors', []) if isinstance(data, dict) else data
+        if not entries:
+            raise ValueError(f"No monitors defined in {self.MONITORS_FILE}")
+
+        configs = []
+        for index, entry in enumerate(entries):
+            overrides = dict(entry)
+            overrides.setdefault('NAME', overrides.pop('name', f"monitor-{index + 1}"))
+            configs.append(Config({**self._overrides, 'MONITORS_FILE': '', **overrides}, env=self._env))
+
+        names = [config.NAME for config in configs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Monitor names must be unique: {names}")
+
+        # Пути, унаследованные из окружения, совпали бы у всех мониторов: общее зеркало удаляет чужие таблицы
+        # и перезаписывает чужое состояние
+        # Аренда HA тоже своя: мониторы одного процесса с общим HA_NODE_ID проходили бы чужую аренду,
+        # а удаленный при перезагрузке монитор снимал бы ее у остальных
+        enabled = {'JOURNAL_PATH': 'JOURNAL_ENABLED', 'HA_LEASE_PATH': 'HA_ENABLED'}
+        for key in ('ANSIBLE_INVENTORY_PATH', 'MIRROR_PATH', 'JOURNAL_PATH', 'HA_LEASE_PATH'):
+            paths = [os.path.abspath(getattr(config, key)) for config in configs
+                     if key not in enabled or getattr(config, enabled[key])]
+            if len(set(paths)) != len(paths):
+                raise ValueError(f"Each monitor needs its own {key}")
+
+        return configs
+
     def validate(self):
         if not self.AIRTABLE_API_KEY:
             raise ValueError("AIRTABLE_API_KEY is required")
         if not self.AIRTABLE_BASE_ID:
             raise ValueError("AIRTABLE_BASE_ID is required")
-        
+
+        if self.HA_ENABLED and self.HA_LEASE_TTL <= 2 * self.POLLING_INTERVAL:
+            raise ValueError("HA_LEASE_TTL must be more than twice POLLING_INTERVAL")
+        # Один медленный такт (запрос к Airtable и проверка доступности) не должен пережить аренду
+        tact_budget = self.AIRTABLE_TIMEOUT + (self.PROBE_TIMEOUT if self.PROBE_ENABLED else 0)
+        if self.HA_ENABLED and self.HA_LEASE_TTL <= tact_budget:
+            raise ValueError(f"HA_LEASE_TTL must be more than AIRTABLE_TIMEOUT plus PROBE_TIMEOUT ({tact_budget:.0f}s)")
+
         if self.TELEGRAM_ENABLED:
             if not self.TELEGRAM_BOT_TOKEN:
                 raise ValueError("TELEGRAM_BOT_TOKEN is required when TELEGRAM_ENABLED=true")
             if not self.TELEGRAM_CHAT_ID:
-                raise ValueError("TELEGRAM_CHAT_ID is required when TELEGRAM_ENABLED=true")
\ No newline at end of file
+                raise ValueError("TELEGRAM_CHAT_ID is required when TELEGRAM_ENABLED=true")
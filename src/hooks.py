@@ -0,0 +1,231 @@
+import contextvars
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from loguru import logger
+
+from src.config import file_mtime
+
+
+class Hook:
+
+    def __init__(self, name: str, command: str, timeout: float, on: Optional[List[str]] = None):
+        self.name = name
+        self.command = command
+        self.timeout = timeout
+        self.on = set(on or [])
+
+    def wants(self, changes: List[Dict]) -> bool:
+        if not self.on:
+            return True
+        return any(change['type'] in self.on for change in changes)
+
+
+def load_hooks(path: str, default_timeout: float) -> List[Hook]:
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+
+    entries = data.get('hooks', []) if isinstance(data, dict) else data
+    hooks = []
+    for index, entry in enumerate(entries):
+        if not entry.get('command'):
+            raise ValueError(f"Hook #{index + 1} in {path} has no command")
+        on = entry.get('on')
+        hooks.append(Hook(
+            entry.get('name', f"hook-{index + 1}"),
+            entry['command'],
+            float(entry.get('timeout', default_timeout)),
+            [on] if isinstance(on, str) else on
+        ))
+    return hooks
+
+
+def merge_change(previous: Optional[Dict], current: Dict) -> Optional[Dict]:
+    # Чистый итог по серверу за всю серию правок: по каждому полю первое старое и последнее новое значение
+    if previous is None:
+        return current
+
+    first, last = previous['type'], current['type']
+    if first == 'added' and last == 'removed':
+        return None
+
+    diff = {}
+    for change in (previous, current):
+        for field, (old, new) in change.get('diff', {}).items():
+            # None в diff добавления и удаления означает пустое поле
+            diff[field] = (diff[field][0] if field in diff else old or '', new or '')
+
+    merged = {key: value for key, value in current.items() if key not in ('diff', 'fields_changed')}
+    if first == 'added':
+        # Сервер появился в этой серии: старых значений нет
+        return dict(merged, type='added', diff={field: (None, new) for field, (_, new) in diff.items() if new})
+    if last == 'removed':
+        return dict(merged, type='removed', diff={field: (old, None) for field, (old, _) in diff.items() if old})
+
+    diff = {field: values for field, values in diff.items() if values[0] != values[1]}
+    if not diff:
+        return None
+    return dict(merged, type='modified', fields_changed=list(diff), diff=diff)
+
+
+class HookRunner:
+
+    def __init__(self, hooks: List[Hook], max_workers: int = 2, debounce: float = 10,
+                 env: Optional[Dict[str, str]] = None, source_mtime: Optional[float] = None):
+        self.hooks = hooks
+        self.debounce = debounce
+        self.env = env or {}
+        # Время изменения HOOKS_FILE, из которого собраны хуки
+        self.source_mtime = source_mtime
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._running = 0
+        self._fire_after_run = False
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="hook") if hooks else None
+
+    @classmethod
+    def from_config(cls, config) -> "HookRunner":
+        source_mtime = file_mtime(config.HOOKS_FILE)
+        hooks = load_hooks(config.HOOKS_FILE, config.HOOKS_TIMEOUT) if config.HOOKS_FILE else []
+        env = {
+            'AIRTABLE_MONITOR': config.NAME,
+            'AIRTABLE_INVENTORY_PATH': config.ANSIBLE_INVENTORY_PATH,
+        }
+        return cls(hooks, config.HOOKS_MAX_WORKERS, config.HOOKS_DEBOUNCE_SECONDS, env, source_mtime)
+
+    def submit(self, changes: List[Dict]):
+        if not self.hooks or not changes:
+            return
+
+        with self._lock:
+            for change in changes:
+                name = change['server_name']
+                merged = merge_change(self._pending.get(name), change)
+                if merged is None:
+                    self._pending.pop(name, None)
+                else:
+                    self._pending[name] = merged
+
+            # Каждая новая публикация откладывает запуск: серия правок дает один запуск
+            if self._timer is not None:
+                self._timer.cancel()
+            # Контекст логгера (префикс монитора) переносится в потоки таймера и пула
+            self._timer = threading.Timer(self.debounce, contextvars.copy_context().run, (self._fire,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def take_pending(self) -> List[Dict]:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending = {}
+            return pending
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+            if self._running:
+                self._fire_after_run = True
+                return
+
+            changes = list(self._pending.values())
+            self._pending = {}
+            hooks = [hook for hook in self.hooks if hook.wants(changes)]
+            if not changes or not hooks:
+                return
+            self._running = len(hooks)
+
+        payload = self._payload(changes)
+        env = dict(os.environ)
+        env.update(self.env)
+        for change_type in ('added', 'removed', 'modified'):
+            env[f"AIRTABLE_{change_type.upper()}"] = ",".join(payload[change_type])
+
+        logger.info(f"Running {len(hooks)} post-publish hooks for {len(changes)} changed servers")
+        for hook in hooks:
+            future = self._executor.submit(
+                contextvars.copy_context().run, self._run_hook, hook, json.dumps(payload, ensure_ascii=False), env
+            )
+            future.add_done_callback(self._hook_done)
+
+    def _payload(self, changes: List[Dict]) -> Dict:
+        payload = {'monitor': self.env.get('AIRTABLE_MONITOR'), 'changes': changes}
+        for change_type in ('added', 'removed', 'modified'):
+            payload[change_type] = sorted(c['server_name'] for c in changes if c['type'] == change_type)
+        return payload
+
+    def _run_hook(self, hook: Hook, stdin: str, env: Dict[str, str]):
+        started = time.monotonic()
+        try:
+            # Своя группа процессов: по таймауту завершается не только shell, но и запущенные им команды
+            proc = subprocess.Popen(
+                hook.command, shell=True, env=env, start_new_session=True,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+        except Exception as e:
+            logger.error(f"Hook {hook.name} failed to start: {e}")
+            return
+
+        try:
+            _, stderr = proc.communicate(stdin, timeout=hook.timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            proc.communicate()
+            logger.error(f"Hook {hook.name} timed out after {hook.timeout:.0f}s")
+            return
+
+        elapsed = time.monotonic() - started
+        if proc.returncode == 0:
+            logger.info(f"Hook {hook.name} finished in {elapsed:.1f}s")
+        else:
+            stderr_tail = ' | '.join(stderr.strip().splitlines()[-5:])
+            logger.error(f"Hook {hook.name} exited with {proc.returncode} after {elapsed:.1f}s"
+                         + (f": {stderr_tail}" if stderr_tail else ""))
+
+    def _hook_done(self, future):
+        with self._lock:
+            self._running -= 1
+            fire = self._running == 0 and self._fire_after_run
+            if fire:
+                self._fire_after_run = False
+        if fire:
+            self._fire()
+
+    def _wait_idle(self):
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+            time.sleep(0.1)
+
+    def flush(self):
+        if not self.hooks:
+            return
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._wait_idle()
+        self._fire()
+        self._wait_idle()
+
+    def shutdown(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                logger.warning(f"Post-publish hooks not run for {len(self._pending)} pending server changes")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,87 @@
+import re
+from typing import Dict, List, Set, Tuple
+
+from src.inventory_generator import COUNTRY_MAPPING, host_sort_key
+
+
+# Имена полей Airtable -> переменные нормализованного хоста
+FIELD_ALIASES = {
+    'server name': 'server_name',
+    'name': 'server_name',
+    'server ip': 'ansible_host',
+    'ip': 'ansible_host',
+    'user': 'ansible_user',
+    'port': 'ansible_port',
+    'os name': 'os_name',
+    'os': 'os_name',
+    'host provider': 'host_provider',
+    'provider': 'host_provider',
+}
+
+INDEXED_ATTRIBUTES = ['location', 'group', 'status', 'os_name', 'host_provider', 'ansible_user', 'ansible_port']
+
+PREDICATE_PATTERN = re.compile(r'^\s*([^!=~]+?)\s*(!=|=|~)\s*(.*?)\s*$')
+
+
+def parse_predicate(expression: str) -> Tuple[str, str, str]:
+    match = PREDICATE_PATTERN.match(expression)
+    if not match:
+        raise ValueError(f"Invalid predicate '{expression}', expected FIELD=VALUE, FIELD!=VALUE or FIELD~TEXT "
+                         f"(alternatives separated by |)")
+    field, operator, value = match.groups()
+    field = field.strip().lower()
+    field = FIELD_ALIASES.get(field, field.replace(' ', '_'))
+    if field == 'location':
+        # Location в inventory хранится кодом страны: Germany -> DE
+        countries = {name.lower(): code for name, code in COUNTRY_MAPPING.items()}
+        value = "|".join(countries.get(item.lower(), item) for item in value.split('|'))
+    return field, operator, value
+
+
+def host_matches(host_config: Dict, field: str, operator: str, value: str) -> bool:
+    # Несколько допустимых значений через |: group=Remnawave-nodes|3X-UI
+    actual = str(host_config.get(field, '')).lower()
+    alternatives = value.lower().split('|')
+    if operator == '=':
+        return actual in alternatives
+    if operator == '!=':
+        return actual not in alternatives
+    return any(alternative in actual for alternative in alternatives)
+
+
+class HostIndex:
+
+    def __init__(self, hosts: Dict[str, Dict]):
+        self.hosts = hosts
+        self.index: Dict[str, Dict[str, Set[str]]] = {attribute: {} for attribute in INDEXED_ATTRIBUTES}
+
+        for hostname, host_config in hosts.items():
+            for attribute in INDEXED_ATTRIBUTES:
+                value = host_config.get(attribute)
+                if value not in (None, ''):
+                    self.index[attribute].setdefault(str(value).lower(), set()).add(hostname)
+
+    def select(self, predicates: List[Tuple[str, str, str]]) -> List[str]:
+        # Сначала пересекаем множества из индексов (от меньшего к большему), остальное проверяем по кандидатам
+        indexed = [p for p in predicates if p[1] == '=' and p[0] in self.index]
+        remaining = [p for p in predicates if p not in indexed]
+
+        candidate_sets = sorted(
+            (
+                set().union(*(self.index[field].get(item, set()) for item in value.lower().split('|')))
+                for field, _, value in indexed
+            ),
+            key=len
+        )
+        if candidate_sets:
+            candidates = set(candidate_sets[0])
+            for hostnames in candidate_sets[1:]:
+                candidates &= hostnames
+        else:
+            candidates = set(self.hosts)
+
+        result = [
+            hostname for hostname in candidates
+            if all(host_matches(self.hosts[hostname], *predicate) for predicate in remaining)
+        ]
+        return sorted(result, key=lambda hostname: (host_sort_key(hostname), hostname))
@@ -1,6 +1,8 @@
-import yaml
 import os
-from typing import List, Dict, Any
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from loguru import logger
 
 
@@ -79,12 +81,44 @@ COUNTRY_MAPPING = {
     'Azerbaijan': 'AZ'
 }
 
+# Переменная хоста -> префикс имени группы Ansible
+GROUP_DIMENSIONS = {
+    'location': 'location',
+    'os_name': 'os',
+    'status': 'status',
+    'host_provider': 'provider',
+    'group': 'group'
+}
+
+DIMENSION_GROUPS_FILENAME = "dimension_groups_inventory.yml"
+UNREACHABLE_GROUP = "unreachable"
+UNREACHABLE_FILENAME = f"{UNREACHABLE_GROUP}_inventory.yml"
+
+
+def host_sort_key(server_name: str) -> int:
+    numbers = re.findall(r'\d+', server_name)
+    if numbers:
+        return int(numbers[0])
+    return 999999
+
 
 class InventoryGenerator:
     
-    def __init__(self, output_path: str = "./inventory", format_type: str = "yaml"):
+    def __init__(self, output_path: str = "./inventory", format_type: str = "yaml",
+                 group_dimensions: Optional[List[str]] = None,
+                 group_combinations: Optional[List[List[str]]] = None, write_workers: int = 1):
         self.output_path = output_path
+        self.write_workers = max(1, write_workers)
         self.format_type = format_type
+        self.group_dimensions = group_dimensions or []
+        self.group_combinations = group_combinations or []
+        self._unknown_countries = set()
+        self._skipped_dimension_values = set()
+        
+        for dimension in self.group_dimensions + [d for combination in self.group_combinations for d in combination]:
+            if dimension not in GROUP_DIMENSIONS:
+                raise ValueError(f"Unknown inventory group dimension '{dimension}', "
+                                 f"expected one of: {', '.join(GROUP_DIMENSIONS)}")
     
     def _convert_country_to_code(self, country_name: str) -> str:
         if not country_name:
@@ -100,7 +134,9 @@ class InventoryGenerator:
             if full_name.lower() == country_lower:
                 return code
         
-        logger.warning(f"Неизвестная страна: {country_name}, используем оригинальное значение")
+        if country_name not in self._unknown_countries:
+            self._unknown_countries.add(country_name)
+            logger.warning(f"Неизвестная страна: {country_name}, используем оригинальное значение")
         return country_name
     
     def generate_inventory(self, servers_data: List[Dict]) -> Dict[str, Any]:
@@ -114,42 +150,7 @@ class InventoryGenerator:
             }
         }
         
-        for server in servers_data:
-            fields = server.get('fields', {})
-            
-            hostname = fields.get('Server name', '').strip()
-            if not hostname:
-                logger.warning(f"Пропускаем сервер без Server name: {server.get('id')}")
-                continue
-            
-            status_value = fields.get('Status', '').strip()
-            ansible_port = 22 if status_value.lower() == 'new' else 11041
-
-            host_config = {
-                "ansible_host": fields.get('Server IP', '').strip(),
-                "ansible_user": fields.get('User', '').strip(),
-                "ansible_port": ansible_port,
-                "server_name": hostname,
-                "status": status_value
-            }
-            
-            if fields.get('Password'):
-                host_config['ansible_password'] = fields.get('Password', '').strip()
-            
-            if fields.get('OS Name'):
-                host_config['os_name'] = fields.get('OS Name', '').strip()
-            if fields.get('Host provider'):
-                host_config['host_provider'] = fields.get('Host provider', '').strip()
-            if fields.get('Location'):
-                location = fields.get('Location', '').strip()
-                host_config['location'] = self._convert_country_to_code(location)
-            if fields.get('Group'):
-                host_config['group'] = fields.get('Group', '').strip()
-            
-            host_config = {k: v for k, v in host_config.items() if v is not None}
-            
-            inventory["all"]["children"]["servers"]["hosts"][hostname] = host_config
-            logger.debug(f"Добавлен сервер {hostname} в inventory")
+        inventory["all"]["children"]["servers"]["hosts"] = self.normalize_hosts(servers_data)
         
         logger.info(f"Сгенерирован inventory для {len(inventory['all']['children']['servers']['hosts'])} серверов")
         return inventory
@@ -158,37 +159,11 @@ class InventoryGenerator:
         os.makedirs(self.output_path, exist_ok=True)
         
         filepath = f"{self.output_path}/{filename}"
+        content = self.render_group(inventory_data["all"]["children"]["servers"]["hosts"])
         
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("---\n")
-                f.write("all:\n")
-                f.write("    children:\n")
-                f.write("        servers:\n")
-                f.write("            hosts:\n")
-                
-                servers = inventory_data["all"]["children"]["servers"]["hosts"]
-                
-                def sort_key(server_name):
-                    import re
-                    numbers = re.findall(r'\d+', server_name)
-                    if numbers:
-                        return int(numbers[0])
-                    return 999999
-                
-                sorted_servers = sorted(servers.items(), key=lambda x: sort_key(x[0]))
-                
-                for i, (server_name, config) in enumerate(sorted_servers):
-                    f.write(f"                {server_name}:\n")
-                    
-                    for key, value in config.items():
-                        if isinstance(value, str) and (' ' in value or ':' in value):
-                            f.write(f"                    {key}: \"{value}\"\n")
-                        else:
-                            f.write(f"                    {key}: {value}\n")
-                    
-                    if i < len(sorted_servers) - 1:
-                        f.write("\n")
+                f.write(content)
             
             logger.info(f"Inventory сохранен в {filepath}")
             return filepath
@@ -197,9 +172,8 @@ class InventoryGenerator:
             logger.error(f"Ошибка при сохранении inventory: {e}")
             raise
     
-    def generate_separate_group_files(self, servers_data: List[Dict]) -> Dict[str, str]:
-        groups = {}
-        ungrouped_servers = {}
+    def normalize_hosts(self, servers_data: List[Dict]) -> Dict[str, Dict]:
+        hosts = {}
         
         for server in servers_data:
             fields = server.get('fields', {})
@@ -209,222 +183,250 @@ class InventoryGenerator:
                 logger.warning(f"Пропускаем сервер без Server name: {server.get('id')}")
                 continue
             
-            status_value = fields.get('Status', '').strip()
-            ansible_port = 22 if status_value.lower() == 'new' else 11041
+            hosts[hostname] = self._build_host_config(hostname, fields)
+        
+        return hosts
+    
+    def _build_host_config(self, hostname: str, fields: Dict) -> Dict[str, Any]:
+        status_value = fields.get('Status', '').strip()
+        ansible_port = 22 if status_value.lower() == 'new' else 11041
 
-            host_config = {
-                "ansible_host": fields.get('Server IP', '').strip(),
-                "ansible_user": fields.get('User', '').strip(),
-                "ansible_port": ansible_port,
-                "server_name": hostname,
-                "status": status_value
-            }
-            
-            if fields.get('Password'):
-                host_config['ansible_password'] = fields.get('Password', '').strip()
-            
-            if fields.get('OS Name'):
-                host_config['os_name'] = fields.get('OS Name', '').strip()
-            if fields.get('Host provider'):
-                host_config['host_provider'] = fields.get('Host provider', '').strip()
-            if fields.get('Location'):
-                location = fields.get('Location', '').strip()
-                host_config['location'] = self._convert_country_to_code(location)
-            if fields.get('Group'):
-                host_config['group'] = fields.get('Group', '').strip()
-            
-            host_config = {k: v for k, v in host_config.items() if v is not None}
-            
-            group_name = fields.get('Group', '').strip()
+        host_config = {
+            "ansible_host": fields.get('Server IP', '').strip(),
+            "ansible_user": fields.get('User', '').strip(),
+            "ansible_port": ansible_port,
+            "server_name": hostname,
+            "status": status_value
+        }
+        
+        if fields.get('Password'):
+            host_config['ansible_password'] = fields.get('Password', '').strip()
+        
+        if fields.get('OS Name'):
+            host_config['os_name'] = fields.get('OS Name', '').strip()
+        if fields.get('Host provider'):
+            host_config['host_provider'] = fields.get('Host provider', '').strip()
+        if fields.get('Location'):
+            location = fields.get('Location', '').strip()
+            host_config['location'] = self._convert_country_to_code(location)
+        if fields.get('Group'):
+            host_config['group'] = fields.get('Group', '').strip()
+        
+        return {k: v for k, v in host_config.items() if v is not None}
+    
+    def generate_separate_group_files(self, servers_data: List[Dict]) -> Dict[str, str]:
+        return self.write_group_files(self.normalize_hosts(servers_data))
+    
+    def write_group_files(self, hosts: Dict[str, Dict]) -> Dict[str, str]:
+        groups = {}
+        ungrouped_servers = {}
+        
+        for hostname, host_config in hosts.items():
+            group_name = host_config.get('group', '')
             if group_name:
                 if group_name not in groups:
                     groups[group_name] = {}
                 groups[group_name][hostname] = host_config
-                logger.debug(f"Добавлен сервер {hostname} в группу {group_name}")
             else:
                 ungrouped_servers[hostname] = host_config
-                logger.debug(f"Добавлен сервер {hostname} без группы")
         
-        created_files = {}
+        if ungrouped_servers:
+            groups["ungrouped"] = ungrouped_servers
         
+        # Рендер упирается в CPU и GIL, поэтому идет в текущем потоке; пул потоков нужен только для записи,
+        # которая на сетевом томе ждет ввода-вывода. Каталог создается один раз, каждый файл пишется одним вызовом
+        started = time.monotonic()
+        rendered = []
         for group_name, servers in groups.items():
-            filepath = self._create_group_file(group_name, servers)
-            created_files[group_name] = filepath
+            render_started = time.monotonic()
+            content = self.render_group(servers)
+            rendered.append((group_name, self._group_filepath(group_name), content,
+                             (time.monotonic() - render_started) * 1000))
+        render_ms = (time.monotonic() - started) * 1000
         
-        if ungrouped_servers:
-            filepath = self._create_group_file("ungrouped", ungrouped_servers)
-            created_files["ungrouped"] = filepath
+        os.makedirs(self.output_path, exist_ok=True)
+        write_started = time.monotonic()
+        if self.write_workers > 1 and len(rendered) > 1:
+            with ThreadPoolExecutor(max_workers=self.write_workers) as executor:
+                write_timings = list(executor.map(lambda item: self._write_group_file(*item), rendered))
+        else:
+            write_timings = [self._write_group_file(*item) for item in rendered]
+        write_ms = (time.monotonic() - write_started) * 1000
         
-        total_servers = sum(len(servers) for servers in groups.values()) + len(ungrouped_servers)
-        logger.info(f"Создано {len(created_files)} файлов для {total_servers} серверов в {len(groups)} группах")
+        created_files = {group_name: filepath for group_name, filepath, _, _ in rendered}
+        
+        total_servers = sum(len(servers) for servers in groups.values())
+        group_count = len(groups) - (1 if ungrouped_servers else 0)
+        logger.info(f"Создано {len(created_files)} файлов для {total_servers} серверов в {group_count} группах")
+        if write_timings:
+            slowest_group, slowest_ms = max(write_timings, key=lambda timing: timing[1])
+            logger.info(f"Файлы групп: рендер {render_ms:.0f} мс, запись {write_ms:.0f} мс "
+                        f"({self.write_workers} потоков), самая долгая запись {slowest_group} ({slowest_ms:.0f} мс)")
         
         return created_files
     
-    def _create_group_file(self, group_name: str, servers: Dict[str, Dict]) -> str:
-        os.makedirs(self.output_path, exist_ok=True)
+    @staticmethod
+    def render_group(servers: Dict[str, Dict], group_name: str = "servers") -> str:
+        lines = ["---", "all:", "    children:", f"        {group_name}:", "            hosts:"]
         
-        safe_group_name = group_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
-        filename = f"{safe_group_name}_inventory.yml"
-        filepath = os.path.join(self.output_path, filename)
+        sorted_servers = sorted(servers.items(), key=lambda item: host_sort_key(item[0]))
+        for i, (server_name, config) in enumerate(sorted_servers):
+            lines.append(f"                {server_name}:")
+            for key, value in config.items():
+                if isinstance(value, str) and (' ' in value or ':' in value):
+                    lines.append(f"                    {key}: \"{value}\"")
+                else:
+                    lines.append(f"                    {key}: {value}")
+            if i < len(sorted_servers) - 1:
+                lines.append("")
         
+        return "\n".join(lines) + "\n"
+    
+    def _group_filepath(self, group_name: str) -> str:
+        safe_group_name = group_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+        return os.path.join(self.output_path, f"{safe_group_name}_inventory.yml")
+    
+    def _write_group_file(self, group_name: str, filepath: str, content: str, render_ms: float) -> Tuple[str, float]:
+        started = time.monotonic()
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("---\n")
-                
-                f.write("all:\n")
-                f.write("    children:\n")
-                f.write("        servers:\n")
-                f.write("            hosts:\n")
-                
-                def sort_key(server_name):
-                    import re
-                    numbers = re.findall(r'\d+', server_name)
-                    if numbers:
-                        return int(numbers[0])
-                    return 999999
-                
-                sorted_servers = sorted(servers.items(), key=lambda x: sort_key(x[0]))
-                
-                for i, (server_name, config) in enumerate(sorted_servers):
-                    f.write(f"                {server_name}:\n")
-                    
-                    for key, value in config.items():
-                        if isinstance(value, str) and (' ' in value or ':' in value):
-                            f.write(f"                    {key}: \"{value}\"\n")
-                        else:
-                            f.write(f"                    {key}: {value}\n")
-                    
-                    if i < len(sorted_servers) - 1:
-                        f.write("\n")
-            
-            logger.info(f"Создан файл для группы {group_name}: {filepath}")
-            return filepath
-            
+                f.write(content)
         except Exception as e:
             logger.error(f"Ошибка при создании файла для группы {group_name}: {e}")
             raise
-    
-    def generate_vpn_inventory(self, servers_data: List[Dict]) -> str:
-        vpn_groups = {'Remnawave-nodes', '3X-UI'}
         
-        logger.info(f"Поиск VPN серверов в группах: {vpn_groups}")
-        logger.info(f"Всего серверов для обработки: {len(servers_data)}")
+        write_ms = (time.monotonic() - started) * 1000
+        logger.debug(f"Создан файл для группы {group_name}: {filepath} (рендер {render_ms:.1f} мс, запись {write_ms:.1f} мс)")
+        return group_name, write_ms
+    
+    def _dimension_group_name(self, dimension: str, value: Any) -> str:
+        value = re.sub(r'[^A-Za-z0-9]+', '_', str(value)).strip('_')
+        # Коды стран оставляем как есть (location_DE), остальное в нижнем регистре (os_ubuntu)
+        if dimension != 'location':
+            value = value.lower()
+        return f"{GROUP_DIMENSIONS[dimension]}_{value}" if value else ""
+    
+    def _skip_dimension_value(self, dimension: str, value: Any, reason: str):
+        if (dimension, value) not in self._skipped_dimension_values:
+            self._skipped_dimension_values.add((dimension, value))
+            logger.warning(f"Значение {value!r} измерения {dimension} пропущено: {reason}")
+    
+    def _dimension_value_names(self, dimension: str, values: Iterable[Any]) -> Dict[Any, str]:
+        # Имена групп - только латиница и цифры: значения без них (кириллица) и значения,
+        # дающие одно имя с другим, пропускаются, а не сливаются в общую группу
+        names = {}
+        owners = {}
+        for value in sorted(values, key=str):
+            group_name = self._dimension_group_name(dimension, value)
+            if not group_name:
+                self._skip_dimension_value(dimension, value, "нет латинских букв и цифр для имени группы")
+            elif group_name in owners:
+                self._skip_dimension_value(dimension, value, f"имя группы {group_name} уже занято значением {owners[group_name]!r}")
+            else:
+                owners[group_name] = value
+                names[value] = group_name
+        return names
+    
+    def build_dimension_index(self, hosts: Dict[str, Dict]) -> Dict[str, List[str]]:
+        # Один проход по хостам: для каждого хоста сразу дописываем его во все группы измерений и комбинаций
+        used_dimensions = set(self.group_dimensions)
+        for combination in self.group_combinations:
+            used_dimensions.update(combination)
         
-        inventory = {
-            "all": {
-                "children": {
-                    "servers": {
-                        "hosts": {}
-                    }
-                }
-            }
+        value_names = {
+            dimension: self._dimension_value_names(
+                dimension, {host_config.get(dimension) for host_config in hosts.values() if host_config.get(dimension)}
+            )
+            for dimension in used_dimensions
         }
         
-        vpn_servers_found = 0
-        all_groups_found = set()
-        
-        for server in servers_data:
-            fields = server.get('fields', {})
-            
-            hostname = fields.get('Server name', '').strip()
-            if not hostname:
-                logger.debug("Пропускаем сервер без имени")
-                continue
-            
-            group_name = fields.get('Group', '').strip()
-            all_groups_found.add(group_name)
-            
-            logger.debug(f"Сервер {hostname}, группа: '{group_name}'")
-            
-            if group_name not in vpn_groups:
-                logger.debug(f"Сервер {hostname} не в VPN группе (группа: '{group_name}')")
-                continue
-            
-            vpn_servers_found += 1
-            logger.info(f"Найден VPN сервер: {hostname} в группе '{group_name}'")
+        index = {}
+        for hostname, host_config in hosts.items():
+            parts = {}
+            for dimension in used_dimensions:
+                value = host_config.get(dimension)
+                if value and value in value_names[dimension]:
+                    parts[dimension] = value_names[dimension][value]
             
-            status_value = fields.get('Status', '').strip()
-            ansible_port = 22 if status_value.lower() == 'new' else 11041
+            for dimension in self.group_dimensions:
+                if dimension in parts:
+                    index.setdefault(parts[dimension], []).append(hostname)
             
-            host_config = {
-                "ansible_host": fields.get('Server IP', '').strip(),
-                "ansible_user": fields.get('User', '').strip(),
-                "ansible_port": ansible_port,
-                "server_name": hostname,
-                "status": status_value,
-                "group": group_name
-            }
-            
-            if fields.get('Password'):
-                host_config['ansible_password'] = fields.get('Password', '').strip()
-            
-            if fields.get('OS Name'):
-                host_config['os_name'] = fields.get('OS Name', '').strip()
-            if fields.get('Host provider'):
-                host_config['host_provider'] = fields.get('Host provider', '').strip()
-            if fields.get('Location'):
-                location = fields.get('Location', '').strip()
-                host_config['location'] = self._convert_country_to_code(location)
-            
-            host_config = {k: v for k, v in host_config.items() if v is not None}
-            
-            inventory["all"]["children"]["servers"]["hosts"][hostname] = host_config
-            logger.debug(f"Добавлен VPN сервер {hostname} (группа: {group_name}) в VPN inventory")
+            for combination in self.group_combinations:
+                if all(dimension in parts for dimension in combination):
+                    group_name = "_".join(parts[dimension] for dimension in combination)
+                    index.setdefault(group_name, []).append(hostname)
         
-        logger.info(f"Всего найдено групп в данных: {sorted(all_groups_found)}")
-        logger.info(f"VPN серверов найдено: {vpn_servers_found}")
-        logger.info(f"Сгенерирован VPN inventory для {len(inventory['all']['children']['servers']['hosts'])} серверов")
+        return index
+    
+    def generate_dimension_groups(self, hosts: Dict[str, Dict]) -> Optional[str]:
+        filepath = os.path.join(self.output_path, DIMENSION_GROUPS_FILENAME)
+        if not self.group_dimensions and not self.group_combinations:
+            # Измерения отключены: файл прошлой конфигурации больше не должен попадать в inventory
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                logger.info("Группы по измерениям не настроены, файл групп удален")
+            return None
         
-        if vpn_servers_found == 0:
-            logger.warning("VPN серверы не найдены! Проверьте названия групп в Airtable.")
-            logger.warning(f"Ожидаемые группы: {vpn_groups}")
-            logger.warning(f"Найденные группы: {sorted(all_groups_found)}")
+        index = self.build_dimension_index(hosts)
         
-        return self.save_vpn_inventory(inventory, "all-vpn-servers.yml")
-
-    def save_vpn_inventory(self, inventory_data: Dict[str, Any], filename: str = "all-vpn-servers.yml") -> str:
         os.makedirs(self.output_path, exist_ok=True)
         
-        filepath = f"{self.output_path}/{filename}"
+        lines = ["---", "all:", "    children:"]
+        for group_name in sorted(index):
+            lines.append(f"        {group_name}:")
+            lines.append("            hosts:")
+            for hostname in sorted(index[group_name], key=host_sort_key):
+                lines.append(f"                {hostname}:")
         
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("---\n")
-                f.write("all:\n")
-                f.write("    children:\n")
-                f.write("        servers:\n")
-                f.write("            hosts:\n")
-                
-                servers = inventory_data["all"]["children"]["servers"]["hosts"]
-                
-                def sort_key(server_name):
-                    import re
-                    numbers = re.findall(r'\d+', server_name)
-                    if numbers:
-                        return int(numbers[0])
-                    return 999999
-                
-                sorted_servers = sorted(servers.items(), key=lambda x: sort_key(x[0]))
-                
-                for i, (server_name, config) in enumerate(sorted_servers):
-                    f.write(f"                {server_name}:\n")
-                    
-                    for key, value in config.items():
-                        if isinstance(value, str) and (' ' in value or ':' in value):
-                            f.write(f"                    {key}: \"{value}\"\n")
-                        else:
-                            f.write(f"                    {key}: {value}\n")
-                    
-                    if i < len(sorted_servers) - 1:
-                        f.write("\n")
-            
-            logger.info(f"VPN inventory сохранен в {filepath}")
-            return filepath
-            
+                f.write("\n".join(lines) + "\n")
         except Exception as e:
-            logger.error(f"Ошибка при сохранении VPN inventory: {e}")
+            logger.error(f"Ошибка при сохранении групп по измерениям: {e}")
             raise
-
+        
+        logger.info(f"Создано {len(index)} групп по измерениям для {len(hosts)} серверов")
+        return filepath
+    
+    def write_unreachable_group(self, hostnames: List[str]) -> Optional[str]:
+        # Хосты остаются в своих группах; отдельная группа позволяет исключить их: --limit '!unreachable'
+        filepath = os.path.join(self.output_path, UNREACHABLE_FILENAME)
+        if not hostnames:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                logger.info("Недоступных по SSH хостов нет, группа unreachable удалена")
+            return None
+        
+        lines = ["---", "all:", "    children:", f"        {UNREACHABLE_GROUP}:", "            hosts:"]
+        for hostname in sorted(hostnames, key=lambda hostname: (host_sort_key(hostname), hostname)):
+            lines.append(f"                {hostname}:")
+        
+        os.makedirs(self.output_path, exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        
+        logger.info(f"Группа {UNREACHABLE_GROUP}: {len(hostnames)} хостов недоступны по SSH")
+        return filepath
+    
+    def build_dynamic_inventory(self, hosts: Dict[str, Dict]) -> Dict[str, Any]:
+        # Формат JSON для ansible-inventory --list: группы Airtable, группы по измерениям и hostvars
+        groups = {}
+        for hostname, host_config in hosts.items():
+            group_name = re.sub(r'[^A-Za-z0-9_]+', '_', host_config.get('group', '')).strip('_') or 'ungrouped'
+            groups.setdefault(group_name, []).append(hostname)
+        
+        if self.group_dimensions or self.group_combinations:
+            groups.update(self.build_dimension_index(hosts))
+        
+        inventory = {
+            '_meta': {'hostvars': hosts},
+            'all': {'children': sorted(groups)}
+        }
+        for group_name, hostnames in groups.items():
+            inventory[group_name] = {'hosts': sorted(hostnames, key=lambda hostname: (host_sort_key(hostname), hostname))}
+        return inventory
+    
     def generate_from_airtable(self, servers_data: List[Dict], filename: str = "inventory.yml") -> str:
         inventory_data = self.generate_inventory(servers_data)
         return self.save_inventory(inventory_data, filename)
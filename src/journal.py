@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from loguru import logger
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    record_id TEXT,
+    server_name TEXT NOT NULL,
+    group_name TEXT,
+    change_type TEXT NOT NULL,
+    field TEXT,
+    old_value TEXT,
+    new_value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_changes_server_ts ON changes (server_name, ts);
+CREATE INDEX IF NOT EXISTS idx_changes_group_ts ON changes (group_name, ts);
+CREATE INDEX IF NOT EXISTS idx_changes_ts ON changes (ts);
+"""
+
+SINCE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_since(value: str) -> float:
+    value = value.strip()
+    if value[:-1].isdigit() and value[-1:] in SINCE_UNITS:
+        return time.time() - int(value[:-1]) * SINCE_UNITS[value[-1]]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}', expected e.g. 30m, 2h, 7d or 2024-05-01T12:00")
+
+
+class ChangeJournal:
+
+    def __init__(self, path: str, retention_days: int = 90, compact_interval: int = 3600):
+        self.path = path
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+        self._conn = None
+        # Первая очистка - на первом такте после запуска
+        self._last_compact = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            # auto_vacuum действует только если задан до создания таблиц
+            self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            # Как и зеркало: обычный журнал отката, а не WAL - файл лежит на общем томе с резервной репликой
+            self._conn.execute("PRAGMA journal_mode = DELETE")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def append(self, changes: List[Dict], ts: Optional[float] = None) -> int:
+        if not changes:
+            return 0
+
+        ts = ts or time.time()
+        rows = []
+        for change in changes:
+            details = change.get('details', {})
+            diff = change.get('diff') or {None: (None, None)}
+            for field, (old_value, new_value) in diff.items():
+                rows.append((
+                    ts,
+                    change.get('record_id'),
+                    change['server_name'],
+                    details.get('Group') or None,
+                    change['type'],
+                    field,
+                    old_value,
+                    new_value
+                ))
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO changes (ts, record_id, server_name, group_name, change_type, field, old_value, new_value) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+        self.maybe_compact()
+        return len(rows)
+
+    def query(self, server: Optional[str] = None, group: Optional[str] = None,
+              since: Optional[float] = None, limit: Optional[int] = None) -> List[Dict]:
+        if not os.path.exists(self.path):
+            return []
+
+        conditions = []
+        params = []
+        if server:
+            conditions.append("server_name = ?")
+            params.append(server)
+        if group:
+            conditions.append("group_name = ?")
+            params.append(group)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+
+        sql = "SELECT ts, record_id, server_name, group_name, change_type, field, old_value, new_value FROM changes"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY ts DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        columns = ['ts', 'record_id', 'server_name', 'group_name', 'change_type', 'field', 'old_value', 'new_value']
+        return [dict(zip(columns, row)) for row in self._connect().execute(sql, params)]
+
+    def maybe_compact(self) -> int:
+        # Вызывается каждый такт: журнал без новых изменений тоже очищается по сроку хранения
+        if time.time() - self._last_compact < self.compact_interval:
+            return 0
+        return self.compact()
+
+    def compact(self) -> int:
+        conn = self._connect()
+        cutoff = time.time() - self.retention_days * 86400
+        with conn:
+            deleted = conn.execute("DELETE FROM changes WHERE ts < ?", (cutoff,)).rowcount
+        conn.execute("PRAGMA incremental_vacuum")
+        self._last_compact = time.time()
+
+        if deleted:
+            logger.info(f"Change journal compacted: {deleted} entries older than {self.retention_days} days removed")
+        return deleted
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,78 @@
+import fcntl
+import json
+import os
+import socket
+import time
+from typing import Dict, Optional
+from loguru import logger
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseLock:
+
+    def __init__(self, path: str, node_id: Optional[str] = None, ttl: float = 15):
+        self.path = path
+        self.node_id = node_id or default_node_id()
+        self.ttl = ttl
+        self._guard_path = f"{path}.guard"
+
+    def _read(self) -> Optional[Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, lease: Dict):
+        tmp_path = f"{self.path}.{self.node_id}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(lease, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _locked(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        guard = open(self._guard_path, 'a')
+        fcntl.flock(guard, fcntl.LOCK_EX)
+        return guard
+
+    def acquire(self) -> bool:
+        # Захват и продление под flock, чтобы две реплики не перезаписали аренду одновременно
+        guard = self._locked()
+        try:
+            now = time.time()
+            lease = self._read()
+
+            if lease and lease.get('holder') != self.node_id and lease.get('expires_at', 0) > now:
+                return False
+
+            self._write({
+                'holder': self.node_id,
+                'acquired_at': lease['acquired_at'] if lease and lease.get('holder') == self.node_id else now,
+                'expires_at': now + self.ttl
+            })
+            return True
+        finally:
+            guard.close()
+
+    def release(self):
+        guard = self._locked()
+        try:
+            lease = self._read()
+            if lease and lease.get('holder') == self.node_id:
+                os.remove(self.path)
+                logger.info(f"Lease released by {self.node_id}")
+        finally:
+            guard.close()
+
+    def holder(self) -> Optional[str]:
+        lease = self._read()
+        if lease and lease.get('expires_at', 0) > time.time():
+            return lease.get('holder')
+        return None
@@ -0,0 +1,27 @@
+import sys
+from loguru import logger
+
+
+def setup_logging(config, background: bool = False):
+    # background=True: запись в sink идет из отдельного потока через очередь и не задерживает такт
+    logger.remove()
+    logger.configure(extra={"prefix": ""})
+    logger.add(
+        sys.stdout,
+        level=config.LOG_LEVEL,
+        format="{time:HH:mm:ss} | {level: <8} | {extra[prefix]}{message}",
+        colorize=False,
+        enqueue=background
+    )
+    
+    if config.LOG_FILE_ENABLED and config.LOG_FILE:
+        retention = config.LOG_FILE_RETENTION
+        logger.add(
+            config.LOG_FILE,
+            level=config.LOG_LEVEL,
+            serialize=True,
+            rotation=config.LOG_FILE_ROTATION,
+            retention=int(retention) if retention.isdigit() else retention,
+            encoding="utf-8",
+            enqueue=background
+        )
@@ -0,0 +1,191 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+from loguru import logger
+
+from src.snapshot import SERVER_FIELDS, ServerRow, TableSnapshot
+
+
+# Атрибут ServerRow -> колонка зеркала (group - зарезервированное слово SQL)
+COLUMNS = {attr: 'group_name' if attr == 'group' else attr for attr in SERVER_FIELDS.values()}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    table_name TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    {columns},
+    fields TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (table_name, record_id)
+);
+CREATE INDEX IF NOT EXISTS idx_records_record_id ON records (record_id);
+CREATE INDEX IF NOT EXISTS idx_records_name ON records (name);
+CREATE INDEX IF NOT EXISTS idx_records_group ON records (group_name);
+CREATE TABLE IF NOT EXISTS tables (
+    table_name TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    record_count INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+""".format(columns=",\n    ".join(f"{column} TEXT" for column in COLUMNS.values()))
+
+
+class InventoryMirror:
+
+    def __init__(self, path: str, index_fields: Optional[List[str]] = None):
+        self.path = path
+        self.index_fields = index_fields or []
+        self._conn = None
+        self._digests: Dict[str, Dict[str, bytes]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Обычный журнал отката, а не WAL: файл читают резервные реплики и CLI с общего тома
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode = DELETE")
+            self._conn.executescript(SCHEMA)
+            self._create_field_indexes()
+        return self._conn
+
+    def _create_field_indexes(self):
+        attrs = {field_name.lower(): attr for field_name, attr in SERVER_FIELDS.items()}
+        for field_name in self.index_fields:
+            attr = attrs.get(field_name.lower(), field_name if field_name in COLUMNS else None)
+            suffix = re.sub(r'[^A-Za-z0-9]+', '_', field_name).strip('_').lower()
+            if attr:
+                expression = COLUMNS[attr]
+            else:
+                # Поля вне SERVER_FIELDS индексируются выражением по JSON записи
+                expression = "json_extract(fields, '$.\"{}\"')".format(field_name.replace("'", "''").replace('"', ''))
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_records_field_{suffix} ON records ({expression})")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def digests(self, table_name: str) -> Dict[str, bytes]:
+        if table_name not in self._digests:
+            rows = self._connect().execute(
+                "SELECT record_id, digest FROM records WHERE table_name = ?", (table_name,)
+            )
+            self._digests[table_name] = {record_id: bytes(digest) for record_id, digest in rows}
+        return self._digests[table_name]
+
+    def load_tables(self, table_names: Iterable[str]) -> Dict[str, TableSnapshot]:
+        self._digests = {}
+        if not self.exists():
+            return {}
+
+        conn = self._connect()
+        columns = ", ".join(COLUMNS.values())
+        tables = {}
+        for table_name in table_names:
+            if conn.execute("SELECT 1 FROM tables WHERE table_name = ?", (table_name,)).fetchone() is None:
+                continue
+
+            digests = {}
+            servers = {}
+            rows = conn.execute(
+                f"SELECT record_id, digest, {columns} FROM records WHERE table_name = ? ORDER BY rowid", (table_name,)
+            )
+            for record_id, digest, *values in rows:
+                digests[record_id] = bytes(digest)
+                row = ServerRow.from_list([record_id] + values)
+                if row.name and row.name.strip():
+                    servers[row.name.strip()] = row
+
+            self._digests[table_name] = digests
+            tables[table_name] = TableSnapshot(TableSnapshot.combine_digests(digests), servers, len(digests), digests)
+        return tables
+
+    def load_state(self) -> Dict:
+        if not self.exists():
+            return {}
+        rows = self._connect().execute("SELECT key, value FROM state")
+        return {key: json.loads(value) for key, value in rows}
+
+    def save(self, tables: Dict[str, TableSnapshot], state: Dict, keep_tables: Optional[List[str]] = None) -> int:
+        # Записи таблиц и состояние монитора фиксируются одной транзакцией
+        conn = self._connect()
+        now = time.time()
+        written = 0
+        placeholders = ", ".join("?" for _ in range(len(COLUMNS) + 5))
+
+        try:
+            with conn:
+                for table_name, table_snapshot in tables.items():
+                    known = self.digests(table_name)
+
+                    upserts = []
+                    for record_id, fields in table_snapshot.changed.items():
+                        digest = table_snapshot.digests[record_id]
+                        if known.get(record_id) == digest:
+                            continue
+                        row = ServerRow.from_fields(record_id, fields)
+                        upserts.append(
+                            (table_name, record_id, digest, *row.to_list()[1:],
+                             json.dumps(fields, ensure_ascii=False, sort_keys=True, default=str), now)
+                        )
+                    if upserts:
+                        conn.executemany(
+                            f"INSERT OR REPLACE INTO records (table_name, record_id, digest, {', '.join(COLUMNS.values())}, "
+                            f"fields, synced_at) VALUES ({placeholders})",
+                            upserts
+                        )
+
+                    removed = [(table_name, record_id) for record_id in known if record_id not in table_snapshot.digests]
+                    if removed:
+                        conn.executemany("DELETE FROM records WHERE table_name = ? AND record_id = ?", removed)
+
+                    conn.execute(
+                        "INSERT OR REPLACE INTO tables (table_name, digest, record_count, synced_at) VALUES (?, ?, ?, ?)",
+                        (table_name, table_snapshot.digest, table_snapshot.record_count, now)
+                    )
+                    # Общий словарь со снимком таблицы, а не третья копия; снимки его не изменяют
+                    self._digests[table_name] = table_snapshot.digests
+                    # Записанные поля больше не нужны в памяти
+                    table_snapshot.changed = {}
+                    written += len(upserts) + len(removed)
+
+                if keep_tables is not None:
+                    for (table_name,) in conn.execute("SELECT table_name FROM tables").fetchall():
+                        if table_name not in keep_tables:
+                            conn.execute("DELETE FROM records WHERE table_name = ?", (table_name,))
+                            conn.execute("DELETE FROM tables WHERE table_name = ?", (table_name,))
+                            self._digests.pop(table_name, None)
+                            logger.info(f"Mirror: table {table_name} is no longer monitored, rows removed")
+
+                conn.executemany(
+                    "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value, ensure_ascii=False, default=str)) for key, value in state.items()]
+                )
+        except Exception:
+            # Транзакция откатилась: кэш дайджестов перечитывается из файла
+            self._digests = {}
+            raise
+
+        if written:
+            logger.debug(f"Mirror: {written} records written to {self.path}")
+        return written
+
+    def load_servers(self, table_names: Iterable[str]) -> Dict[str, ServerRow]:
+        servers = {}
+        for table_snapshot in self.load_tables(table_names).values():
+            servers.update(table_snapshot.servers)
+        return servers
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._digests = {}
@@ -1,77 +1,369 @@
+import os
 import time
-import hashlib
-import json
-import sys
 from datetime import datetime
+from typing import List, Optional
 from loguru import logger
 
-from src.config import Config
+from src.config import Config, file_mtime
 from src.airtable_client import AirtableClient
 from src.inventory_generator import InventoryGenerator
+from src.views import ViewEngine
 from src.telegram_notifier import TelegramNotifier
+from src.snapshot import ServerRow, SnapshotBuilder
+from src.mirror import InventoryMirror
+from src.lease import LeaseLock
+from src.journal import ChangeJournal
+from src.rate_limiter import RateLimiter
+from src.circuit_breaker import CircuitBreaker
+from src.reachability import probe_hosts
+from src.hooks import HookRunner
+
+
+CHANGE_FIELDS = ['Server IP', 'OS Name', 'Location', 'Group', 'Status', 'User']
+
+LOG_CHANGES_LIMIT = 20
+
+# Поля, от которых зависит доступность хоста по SSH
+PROBE_FIELDS = {'Server IP', 'Status'}
+
+AIRTABLE_KEYS = {'AIRTABLE_API_KEY', 'AIRTABLE_BASE_ID', 'AIRTABLE_TABLE_NAME', 'AIRTABLE_TABLES',
+                 'AIRTABLE_RATE_LIMIT', 'AIRTABLE_TIMEOUT'}
+INVENTORY_KEYS = {'ANSIBLE_INVENTORY_PATH', 'ANSIBLE_INVENTORY_FORMAT', 'VIEWS_FILE', 'INVENTORY_WRITE_WORKERS',
+                  'INVENTORY_GROUP_DIMENSIONS', 'INVENTORY_GROUP_COMBINATIONS'}
+MIRROR_KEYS = {'MIRROR_PATH', 'MIRROR_INDEX_FIELDS'}
+JOURNAL_KEYS = {'JOURNAL_ENABLED', 'JOURNAL_PATH', 'JOURNAL_RETENTION_DAYS', 'JOURNAL_COMPACT_INTERVAL'}
+TELEGRAM_KEYS = {'TELEGRAM_ENABLED', 'TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID', 'TELEGRAM_TOPIC_ID'}
+CIRCUIT_KEYS = {'CIRCUIT_FAILURE_THRESHOLD', 'CIRCUIT_BACKOFF_BASE', 'CIRCUIT_BACKOFF_MAX'}
+HOOKS_KEYS = {'HOOKS_FILE', 'HOOKS_TIMEOUT', 'HOOKS_MAX_WORKERS', 'HOOKS_DEBOUNCE_SECONDS', 'NAME', 'ANSIBLE_INVENTORY_PATH'}
+HA_KEYS = {'HA_ENABLED', 'HA_LEASE_PATH', 'HA_LEASE_TTL', 'HA_NODE_ID'}
 
 
 class AirtableMonitor:
     
-    def __init__(self):
-        self.config = Config()
-        self.config.validate()
+    def __init__(self, config: Optional[Config] = None, session=None, rate_limiter: Optional[RateLimiter] = None):
+        if config is None:
+            config = Config()
+            config.validate()
+        self.config = config
+        self._session = session
+        self._rate_limiter = rate_limiter
         
-        logger.remove()
-        logger.add(
-            sys.stdout,
-            level=self.config.LOG_LEVEL,
-            format="{time:HH:mm:ss} | {level: <8} | {message}",
-            colorize=False
-        )
-        
-        self.airtable = AirtableClient(
-            self.config.AIRTABLE_API_KEY,
-            self.config.AIRTABLE_BASE_ID,
-            self.config.AIRTABLE_TABLES[0]
-        )
-        
-        self.inventory_gen = InventoryGenerator(
-            self.config.ANSIBLE_INVENTORY_PATH,
-            self.config.ANSIBLE_INVENTORY_FORMAT
-        )
-        
-        self.telegram_notifier = None
-        if self.config.TELEGRAM_ENABLED:
-            topic_id = int(self.config.TELEGRAM_TOPIC_ID) if self.config.TELEGRAM_TOPIC_ID else None
-            self.telegram_notifier = TelegramNotifier(
-                self.config.TELEGRAM_BOT_TOKEN,
-                self.config.TELEGRAM_CHAT_ID,
-                topic_id
-            )
+        self.airtable = self._create_airtable(config, rate_limiter)
+        self.inventory_gen, self.views = self._create_inventory_generator(config)
+        self.mirror = self._create_mirror(config)
+        self.journal = self._create_journal(config)
+        self.telegram_notifier = self._create_notifier(config)
+        self.hooks = self._create_hooks(config)
         
         self.last_data_hash = None
+        self.published_hash = None
         self.last_check_time = None
         self.last_servers_data = {}
         
         self.pending_changes = []
+        self.published_changes = []
         self.last_change_tact = None
         self.tacts_since_last_change = 0
         self.is_editing_session = False
+        self.tact_count = 0
+        self._idle_tacts = 0
+        self._idle_ms = 0.0
+        
+        self.breakers = {}
+        self.table_snapshots = {}
+        self.stale = False
+        self.stale_tables = []
+        self.stale_since = None
+        
+        self.unreachable = {}
+        self._next_probe = 0.0
+        
+        self.lease = self._create_lease(config)
+        self.is_leader = self.lease is None
+        
+        self._state_mtime = None
+        self._restore_state()
         
         logger.info("AirtableMonitor initialized")
     
-    def _get_data_hash(self, data: list) -> str:
-        sorted_data = sorted(data, key=lambda x: x.get('id', ''))
-        data_str = json.dumps(sorted_data, sort_keys=True, default=str)
-        return hashlib.md5(data_str.encode()).hexdigest()
+    def _create_airtable(self, config: Config, rate_limiter: Optional[RateLimiter]) -> AirtableClient:
+        return AirtableClient.from_config(config, session=self._session, rate_limiter=rate_limiter)
     
-    def _extract_server_data(self, records: list) -> dict:
+    def _create_inventory_generator(self, config: Config):
+        inventory_gen = InventoryGenerator(
+            config.ANSIBLE_INVENTORY_PATH,
+            config.ANSIBLE_INVENTORY_FORMAT,
+            config.INVENTORY_GROUP_DIMENSIONS,
+            config.INVENTORY_GROUP_COMBINATIONS,
+            config.INVENTORY_WRITE_WORKERS
+        )
+        return inventory_gen, ViewEngine.from_config(config)
+    
+    def _create_mirror(self, config: Config) -> InventoryMirror:
+        return InventoryMirror(config.MIRROR_PATH, config.MIRROR_INDEX_FIELDS)
+    
+    def _create_journal(self, config: Config) -> Optional[ChangeJournal]:
+        if not config.JOURNAL_ENABLED:
+            return None
+        return ChangeJournal(config.JOURNAL_PATH, config.JOURNAL_RETENTION_DAYS, config.JOURNAL_COMPACT_INTERVAL)
+    
+    def _create_notifier(self, config: Config) -> Optional[TelegramNotifier]:
+        if not config.TELEGRAM_ENABLED:
+            return None
+        return TelegramNotifier.from_config(config, session=self._session)
+    
+    def _create_hooks(self, config: Config) -> HookRunner:
+        return HookRunner.from_config(config)
+    
+    def _create_lease(self, config: Config) -> Optional[LeaseLock]:
+        if not config.HA_ENABLED:
+            return None
+        return LeaseLock(config.HA_LEASE_PATH, config.HA_NODE_ID, config.HA_LEASE_TTL)
+    
+    def apply_config(self, config: Config, rate_limiter: Optional[RateLimiter] = None) -> List[str]:
+        old_values = self.config.values()
+        new_values = config.values()
+        changed = sorted(key for key in set(old_values) | set(new_values) if old_values.get(key) != new_values.get(key))
+        # Путь к файлу тот же, но содержимое могло измениться
+        if 'VIEWS_FILE' not in changed and file_mtime(config.VIEWS_FILE) != self.views.source_mtime:
+            changed.append('VIEWS_FILE')
+        if 'HOOKS_FILE' not in changed and file_mtime(config.HOOKS_FILE) != self.hooks.source_mtime:
+            changed.append('HOOKS_FILE')
+        if not changed and rate_limiter is self._rate_limiter:
+            return []
+        
+        keys = set(changed)
+        if rate_limiter is not None and rate_limiter is not self._rate_limiter:
+            keys.add('AIRTABLE_RATE_LIMIT')
+        else:
+            rate_limiter = self._rate_limiter
+        
+        # Сначала создаем все затронутые части: если новая конфигурация не собирается,
+        # исключение уходит вызывающему, а монитор целиком остается на прежней
+        built = {}
+        if keys & AIRTABLE_KEYS:
+            built['airtable'] = self._create_airtable(config, rate_limiter)
+        if keys & INVENTORY_KEYS:
+            built['inventory_gen'], built['views'] = self._create_inventory_generator(config)
+        if keys & MIRROR_KEYS:
+            built['mirror'] = self._create_mirror(config)
+        if keys & JOURNAL_KEYS:
+            built['journal'] = self._create_journal(config)
+        if keys & TELEGRAM_KEYS:
+            built['telegram_notifier'] = self._create_notifier(config)
+        if keys & HA_KEYS:
+            built['lease'] = self._create_lease(config)
+        if keys & HOOKS_KEYS:
+            # Последним: единственная часть с собственными потоками
+            built['hooks'] = self._create_hooks(config)
+        
+        # Пересоздаем только затронутые части; снимок, ожидающие алерты и соединения сохраняются
+        self.config = config
+        self._rate_limiter = rate_limiter
+        if 'airtable' in built:
+            self.airtable = built['airtable']
+        if 'inventory_gen' in built:
+            self.inventory_gen, self.views = built['inventory_gen'], built['views']
+            # Новое место или формат: inventory переписывается целиком на следующем такте
+            self.published_hash = None
+        if 'mirror' in built:
+            self.mirror.close()
+            self.mirror = built['mirror']
+            # Новое зеркало заполняется целиком при следующей успешной выгрузке
+            self.last_data_hash = None
+        if keys & CIRCUIT_KEYS:
+            self.breakers = {}
+        if 'journal' in built:
+            if self.journal:
+                self.journal.close()
+            self.journal = built['journal']
+        if 'telegram_notifier' in built:
+            self.telegram_notifier = built['telegram_notifier']
+        if 'hooks' in built:
+            # Накопленные, но еще не отправленные изменения переходят к новому набору хуков
+            pending = self.hooks.take_pending()
+            self.hooks.shutdown()
+            self.hooks = built['hooks']
+            self.hooks.submit(pending)
+        if 'lease' in built:
+            self.release_leadership()
+            self.lease = built['lease']
+            self.is_leader = self.lease is None
+        
+        logger.info(f"Configuration reloaded, changed: {', '.join(changed) or 'rate limiter'}")
+        return changed
+    
+    def _restore_state(self) -> bool:
+        try:
+            mtime = os.path.getmtime(self.config.MIRROR_PATH)
+        except OSError:
+            return False
+        
+        if mtime == self._state_mtime:
+            return False
+        
+        try:
+            state = self.mirror.load_state()
+            tables = self.mirror.load_tables(self.config.AIRTABLE_TABLES)
+        except Exception as e:
+            logger.error(f"Error loading mirror: {e}")
+            return False
+        
+        self._state_mtime = mtime
+        if not state.get('hash'):
+            return False
+        
         servers = {}
-        for record in records:
-            fields = record.get('fields', {})
-            server_name = fields.get('Server name', '').strip()
-            if server_name:
-                servers[server_name] = {
-                    'id': record.get('id'),
-                    'fields': fields
-                }
-        return servers
+        for table_snapshot in tables.values():
+            servers.update(table_snapshot.servers)
+        
+        self.last_data_hash = state['hash']
+        self.published_hash = state.get('published_hash')
+        self.last_servers_data = servers
+        self.last_check_time = datetime.fromtimestamp(state['saved_at'])
+        # Таблицы зеркала служат последними известными данными, если Airtable недоступен сразу после запуска
+        self.table_snapshots = tables
+        
+        self.pending_changes = state.get('pending_changes', [])
+        self.is_editing_session = bool(self.pending_changes)
+        self.last_change_tact = self.tact_count if self.pending_changes else None
+        self.tacts_since_last_change = 0
+        
+        self.stale = state.get('stale', False)
+        self.stale_tables = state.get('stale_tables', [])
+        self.stale_since = state.get('stale_since')
+        self.unreachable = state.get('unreachable', {})
+        
+        logger.info(f"Restored {len(self.last_servers_data)} servers from mirror {self.config.MIRROR_PATH}")
+        return True
+    
+    def _persist_state(self, snapshot: Optional[SnapshotBuilder] = None):
+        tables = {}
+        if snapshot is not None:
+            # В зеркало попадают только свежие таблицы; для устаревших в нем остаются последние полученные данные
+            tables = {name: table for name, table in snapshot.tables.items() if name not in snapshot.stale_tables}
+        
+        try:
+            self.mirror.save(
+                tables,
+                {
+                    'hash': self.last_data_hash,
+                    'published_hash': self.published_hash,
+                    'saved_at': time.time(),
+                    'pending_changes': self.pending_changes,
+                    'stale': self.stale,
+                    'stale_tables': self.stale_tables,
+                    'stale_since': self.stale_since,
+                    'unreachable': self.unreachable
+                },
+                keep_tables=self.config.AIRTABLE_TABLES if snapshot is not None else None
+            )
+            self._state_mtime = os.path.getmtime(self.config.MIRROR_PATH)
+        except Exception as e:
+            logger.error(f"Error saving mirror: {e}")
+    
+    def acquire_leadership(self) -> bool:
+        if not self.lease:
+            return True
+        
+        try:
+            leader = self.lease.acquire()
+        except OSError as e:
+            logger.error(f"Lease error: {e}")
+            leader = False
+        
+        if leader and not self.is_leader:
+            logger.info(f"Lease acquired by {self.lease.node_id}, switching to active")
+            self._restore_state()
+        elif not leader and self.is_leader:
+            logger.warning(f"Lease lost to {self.lease.holder()}, switching to standby")
+        
+        self.is_leader = leader
+        return leader
+    
+    def release_leadership(self):
+        if self.lease and self.is_leader:
+            try:
+                self.lease.release()
+            except OSError as e:
+                logger.error(f"Error releasing lease: {e}")
+            self.is_leader = False
+    
+    def standby_tact(self):
+        if self._restore_state():
+            logger.info("Standby snapshot refreshed from active replica")
+        logger.debug(f"Standby, active replica: {self.lease.holder() if self.lease else None}")
+    
+    def next_delay(self) -> float:
+        if self.is_leader:
+            return self.config.POLLING_INTERVAL
+        # Резерв проверяет аренду чаще, чтобы перехватить ее в пределах одного периода
+        return min(self.config.POLLING_INTERVAL, self.config.HA_LEASE_TTL / 2)
+    
+    def _breaker(self, table_name: str) -> CircuitBreaker:
+        breaker = self.breakers.get(table_name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                self.config.CIRCUIT_FAILURE_THRESHOLD,
+                self.config.CIRCUIT_BACKOFF_BASE,
+                self.config.CIRCUIT_BACKOFF_MAX
+            )
+            self.breakers[table_name] = breaker
+        return breaker
+    
+    def _fetch_snapshot(self) -> SnapshotBuilder:
+        snapshot = SnapshotBuilder()
+        
+        for table_name in self.config.AIRTABLE_TABLES:
+            breaker = self._breaker(table_name)
+            
+            if breaker.allow():
+                try:
+                    table_snapshot = snapshot.add_table(
+                        table_name, self.airtable.iter_records(table_name), self.mirror.digests(table_name),
+                        self.table_snapshots.get(table_name)
+                    )
+                    breaker.record_success()
+                    self.table_snapshots[table_name] = table_snapshot
+                    logger.debug(f"Table {table_name}: {table_snapshot.record_count} records")
+                    continue
+                except Exception as e:
+                    breaker.record_failure()
+                    logger.error(f"Error getting data from table {table_name}: {e}, "
+                                 f"next attempt in {breaker.retry_in():.0f}s")
+            
+            # Источник недоступен: отдаем последние успешно полученные данные таблицы
+            cached = self.table_snapshots.get(table_name)
+            if cached is not None:
+                snapshot.add_snapshot(table_name, cached, stale=True)
+            else:
+                snapshot.add_missing(table_name)
+        
+        return snapshot
+    
+    def _update_stale_state(self, snapshot: SnapshotBuilder) -> bool:
+        stale_tables = snapshot.stale_tables + snapshot.missing_tables
+        was_stale = self.stale
+        self.stale = bool(stale_tables)
+        
+        if self.stale and not was_stale:
+            self.stale_since = time.time()
+            logger.warning(f"Airtable unavailable for {', '.join(stale_tables)}, serving last-known-good data")
+        elif was_stale and not self.stale:
+            self.stale_since = None
+            logger.info("Airtable recovered, data is fresh again")
+        
+        changed = self.stale_tables != stale_tables
+        self.stale_tables = stale_tables
+        return changed
+    
+    def _tracked_values(self, server_data: ServerRow) -> dict:
+        values = {}
+        for field_name in CHANGE_FIELDS:
+            value = server_data.get(field_name, '').strip()
+            if value:
+                values[field_name] = value
+        return values
     
     def _detect_changes(self, current_servers: dict, previous_servers: dict) -> list:
         changes = []
@@ -88,11 +380,13 @@ class AirtableMonitor:
             changes.append({
                 'type': 'added',
                 'server_name': name,
+                'record_id': server_data.id,
+                'diff': {field_name: (None, value) for field_name, value in self._tracked_values(server_data).items()},
                 'details': {
-                    'IP': server_data['fields'].get('Server IP', ''),
-                    'OS': server_data['fields'].get('OS Name', ''),
-                    'Location': server_data['fields'].get('Location', ''),
-                    'Group': server_data['fields'].get('Group', '')
+                    'IP': server_data.get('Server IP', ''),
+                    'OS': server_data.get('OS Name', ''),
+                    'Location': server_data.get('Location', ''),
+                    'Group': server_data.get('Group', '')
                 }
             })
         
@@ -101,30 +395,36 @@ class AirtableMonitor:
             changes.append({
                 'type': 'removed',
                 'server_name': name,
+                'record_id': server_data.id,
+                'diff': {field_name: (value, None) for field_name, value in self._tracked_values(server_data).items()},
                 'details': {
-                    'IP': server_data['fields'].get('Server IP', ''),
-                    'OS': server_data['fields'].get('OS Name', ''),
-                    'Location': server_data['fields'].get('Location', ''),
-                    'Group': server_data['fields'].get('Group', '')
+                    'IP': server_data.get('Server IP', ''),
+                    'OS': server_data.get('OS Name', ''),
+                    'Location': server_data.get('Location', ''),
+                    'Group': server_data.get('Group', '')
                 }
             })
         
         for name in modified_names:
-            current_fields = current_servers[name]['fields']
-            previous_fields = previous_servers[name]['fields']
+            current_fields = current_servers[name]
+            previous_fields = previous_servers[name]
             
             fields_changed = []
-            for field_name in ['Server IP', 'OS Name', 'Location', 'Group', 'Status', 'User']:
+            diff = {}
+            for field_name in CHANGE_FIELDS:
                 current_value = current_fields.get(field_name, '').strip()
                 previous_value = previous_fields.get(field_name, '').strip()
                 if current_value != previous_value:
                     fields_changed.append(field_name)
+                    diff[field_name] = (previous_value, current_value)
             
             if fields_changed:
                 changes.append({
                     'type': 'modified',
                     'server_name': name,
+                    'record_id': current_fields.id,
                     'fields_changed': fields_changed,
+                    'diff': diff,
                     'details': {
                         'IP': current_fields.get('Server IP', ''),
                         'OS': current_fields.get('OS Name', ''),
@@ -135,6 +435,24 @@ class AirtableMonitor:
         
         return changes
     
+    def _journal_changes(self, changes: list):
+        if not self.journal:
+            return
+        
+        try:
+            self.journal.append(changes)
+        except Exception as e:
+            logger.error(f"Error writing change journal: {e}")
+    
+    def _compact_journal(self):
+        if not self.journal:
+            return
+        
+        try:
+            self.journal.maybe_compact()
+        except Exception as e:
+            logger.error(f"Error compacting change journal: {e}")
+    
     def _should_send_alert(self, current_tact: int) -> bool:
         if not self.pending_changes:
             return False
@@ -166,62 +484,77 @@ class AirtableMonitor:
         self.last_change_tact = None
         self.tacts_since_last_change = 0
         self.is_editing_session = False
+        self._persist_state()
         return True
     
     def check_for_changes(self, current_tact: int) -> bool:
         try:
-            logger.info("Checking for changes in Airtable...")
+            logger.debug("Checking for changes in Airtable...")
             
-            all_tables_data = self.airtable.get_all_records_from_tables(self.config.AIRTABLE_TABLES)
+            snapshot = self._fetch_snapshot()
+            stale_changed = self._update_stale_state(snapshot)
             
-            all_records = []
-            for table_name, records in all_tables_data.items():
-                logger.info(f"Table {table_name}: {len(records)} records")
-                all_records.extend(records)
+            if not snapshot.is_complete():
+                # Без данных хотя бы одной таблицы сравнение невозможно: неполная выгрузка не считается изменением
+                logger.warning(f"Incomplete data (no data for {', '.join(snapshot.missing_tables)}), check skipped")
+                if stale_changed and self.last_data_hash is not None:
+                    self._persist_state()
+                return False
             
-            current_hash = self._get_data_hash(all_records)
-            logger.info(f"Total hash: {current_hash}")
+            current_hash = snapshot.digest()
+            logger.debug(f"Total hash: {current_hash}")
             
             if self.last_data_hash is None:
                 logger.info("Initial data load")
                 self.last_data_hash = current_hash
                 self.last_check_time = datetime.now()
-                self.last_servers_data = self._extract_server_data(all_records)
+                self.last_servers_data = snapshot.servers
+                self._persist_state(snapshot)
                 return True
             
             if current_hash != self.last_data_hash:
                 logger.info("CHANGES DETECTED IN AIRTABLE!")
-                logger.info(f"Old hash: {self.last_data_hash}")
-                logger.info(f"New hash: {current_hash}")
+                logger.debug(f"Old hash: {self.last_data_hash}")
+                logger.debug(f"New hash: {current_hash}")
                 
-                current_servers = self._extract_server_data(all_records)
+                current_servers = snapshot.servers
                 changes = self._detect_changes(current_servers, self.last_servers_data)
                 
                 if changes:
                     logger.info(f"Detected {len(changes)} changes:")
-                    for change in changes:
+                    for change in changes[:LOG_CHANGES_LIMIT]:
                         logger.info(f"  {change['type']}: {change['server_name']}")
+                    if len(changes) > LOG_CHANGES_LIMIT:
+                        logger.info(f"  ... and {len(changes) - LOG_CHANGES_LIMIT} more")
+                    
+                    self._journal_changes(changes)
                     
                     self.is_editing_session = True
                     self.last_change_tact = current_tact
                     self.tacts_since_last_change = 0
                     
                     self.pending_changes = changes
+                    # Изменения копятся до успешной публикации, чтобы хуки и проверка доступности их не потеряли
+                    self.published_changes = self.published_changes + changes
                     logger.info(f"Started editing session, waiting for {self.config.ALERT_TACTS_TIMEOUT} tacts after last change")
                 
                 self.last_data_hash = current_hash
                 self.last_check_time = datetime.now()
                 self.last_servers_data = current_servers
+                self._persist_state(snapshot)
                 return True
             else:
-                logger.info("No changes detected")
+                logger.debug("No changes detected")
+                
+                if stale_changed:
+                    self._persist_state()
                 
                 if self.is_editing_session:
                     self.tacts_since_last_change += 1
-                    logger.info(f"Editing session active, tacts since last change: {self.tacts_since_last_change}")
+                    logger.debug(f"Editing session active, tacts since last change: {self.tacts_since_last_change}")
                     
                     tacts_passed = current_tact - self.last_change_tact
-                    logger.info(f"Tacts passed: {tacts_passed}, required: {self.config.ALERT_TACTS_TIMEOUT}")
+                    logger.debug(f"Tacts passed: {tacts_passed}, required: {self.config.ALERT_TACTS_TIMEOUT}")
                     
                     if self._should_send_alert(current_tact):
                         logger.info("Alert timeout reached, sending alert")
@@ -234,110 +567,183 @@ class AirtableMonitor:
             logger.error(f"Error checking for changes: {e}")
             return False
     
+    def _probe(self, hosts: dict, hostnames: set) -> dict:
+        targets = {}
+        for hostname in hostnames:
+            host_config = hosts.get(hostname)
+            if host_config and host_config.get('ansible_host'):
+                targets[hostname] = (host_config['ansible_host'], host_config['ansible_port'])
+            else:
+                self.unreachable.pop(hostname, None)
+        
+        results = probe_hosts(targets, self.config.PROBE_TIMEOUT, self.config.PROBE_CONCURRENCY)
+        for hostname, reachable in results.items():
+            if reachable:
+                self.unreachable.pop(hostname, None)
+            else:
+                self.unreachable[hostname] = "{}:{}".format(*targets[hostname])
+        
+        self._next_probe = time.monotonic() + self.config.PROBE_RETRY_INTERVAL
+        return results
+    
+    def _probe_changed_hosts(self, hosts: dict):
+        # Проверяем только новые хосты, смену адреса или статуса и ранее недоступные хосты, а не весь парк
+        changed = {
+            change['server_name'] for change in self.published_changes
+            if change['type'] == 'added' or (change['type'] == 'modified' and PROBE_FIELDS & set(change['fields_changed']))
+        }
+        # Удаленные из Airtable хосты больше не помечаем
+        self.unreachable = {hostname: target for hostname, target in self.unreachable.items() if hostname in hosts}
+        results = self._probe(hosts, changed | set(self.unreachable))
+        
+        for change in self.published_changes:
+            hostname = change['server_name']
+            if hostname in results:
+                change['reachable'] = results[hostname]
+                if not results[hostname]:
+                    change['probe_target'] = self.unreachable[hostname]
+                    logger.warning(f"Host {hostname} is not reachable on {self.unreachable[hostname]}")
+    
+    def recheck_unreachable(self):
+        if not self.config.PROBE_ENABLED or not self.unreachable or time.monotonic() < self._next_probe:
+            return
+        
+        previous = dict(self.unreachable)
+        hosts = self.inventory_gen.normalize_hosts(
+            self.last_servers_data[hostname].to_record() for hostname in self.unreachable if hostname in self.last_servers_data
+        )
+        self.unreachable = {hostname: target for hostname, target in self.unreachable.items() if hostname in hosts}
+        self._probe(hosts, set(hosts))
+        
+        if self.unreachable != previous:
+            recovered = sorted(set(previous) - set(self.unreachable))
+            if recovered:
+                logger.info(f"Hosts reachable again: {', '.join(recovered)}")
+            self.inventory_gen.write_unreachable_group(list(self.unreachable))
+            self._persist_state()
+    
     def update_inventory(self) -> bool:
         try:
-            logger.info("Updating Ansible inventory with separate group files...")
+            logger.debug("Updating Ansible inventory with separate group files...")
             
-            all_tables_data = self.airtable.get_all_records_from_tables(self.config.AIRTABLE_TABLES)
-            
-            all_servers = []
-            for table_name, records in all_tables_data.items():
-                logger.info(f"Processing table {table_name}: {len(records)} records")
-                all_servers.extend(records)
+            # Серверы последней выгрузки из Airtable, уже лежащие в памяти; Airtable повторно не опрашивается.
+            # Из зеркала они читаются только при запуске, до первой успешной выгрузки
+            all_servers = [row.to_record() for row in self.last_servers_data.values()]
             
             if not all_servers:
+                # Публиковать нечего; повторять попытку каждый такт бессмысленно
                 logger.warning("No server data in Airtable")
-                return False
+                return True
+            
+            hosts = self.inventory_gen.normalize_hosts(all_servers)
+            
+            if self.config.PROBE_ENABLED:
+                self._probe_changed_hosts(hosts)
+            
+            # Сводные представления (по умолчанию all-vpn-servers.yml) за один проход по хостам; до файлов групп,
+            # чтобы удаление файлов убранных представлений не задело файлы, записанные в этом такте
+            view_files = self.views.render(hosts)
+            
+            created_files = self.inventory_gen.write_group_files(hosts)
+            
+            dimension_filepath = self.inventory_gen.generate_dimension_groups(hosts)
+            if dimension_filepath:
+                created_files["dimension_groups"] = dimension_filepath
             
-            created_files = self.inventory_gen.generate_separate_group_files(all_servers)
+            created_files.update(view_files)
             
-            # Генерируем дополнительный VPN инвентарь
-            vpn_filepath = self.inventory_gen.generate_vpn_inventory(all_servers)
-            created_files["vpn_servers"] = vpn_filepath
+            unreachable = list(self.unreachable) if self.config.PROBE_ENABLED else []
+            unreachable_filepath = self.inventory_gen.write_unreachable_group(unreachable)
+            if unreachable_filepath:
+                created_files["unreachable"] = unreachable_filepath
             
-            logger.info("Created files:")
+            logger.debug("Created files:")
             for group_name, filepath in created_files.items():
-                logger.info(f"  - {group_name}: {filepath}")
+                logger.debug(f"  - {group_name}: {filepath}")
             
-            logger.info("Inventory successfully updated with separate group files and VPN inventory")
+            logger.info(f"Inventory updated: {len(created_files)} files for {len(all_servers)} servers")
             return True
             
         except Exception as e:
             logger.error(f"Error updating inventory: {e}")
             return False
     
-    def run_single_check(self, current_tact: int):
+    def _publish_pending(self) -> bool:
+        return self.last_data_hash is not None and self.published_hash != self.last_data_hash
+    
+    def run_single_check(self, current_tact: int) -> bool:
+        has_changes = False
         try:
-            logger.info("=== Starting check ===")
+            logger.debug("=== Starting check ===")
             
             has_changes = self.check_for_changes(current_tact)
+            # Принятые данные еще не опубликованы: прошлая публикация упала или аренда ушла до нее
+            publish = has_changes or self._publish_pending()
             
-            if has_changes:
+            if publish and not self.acquire_leadership():
+                logger.warning("Lease lost before publishing, inventory not updated")
+            elif publish:
+                if not has_changes:
+                    logger.info("Inventory is behind accepted data, publishing")
                 success = self.update_inventory()
                 if success:
-                    logger.info("Inventory successfully updated")
+                    logger.debug("Inventory successfully updated")
+                    self.published_hash = self.last_data_hash
+                    self._persist_state()
+                    self.hooks.submit(self.published_changes)
+                    self.published_changes = []
                 else:
                     logger.error("Error updating inventory")
             else:
-                logger.info("No changes, inventory not updated")
+                logger.debug("No changes, inventory not updated")
+                self.recheck_unreachable()
             
-            logger.info("=== Check completed ===")
+            logger.debug("=== Check completed ===")
             
         except Exception as e:
             logger.error(f"Error during check: {e}")
+        
+        return has_changes
     
-    def test_connection(self) -> bool:
-        try:
-            logger.info("Testing Airtable connection...")
-            airtable_success = self.airtable.test_connection()
-            
-            telegram_success = True
-            if self.telegram_notifier:
-                logger.info("Testing Telegram connection...")
-                telegram_success = self.telegram_notifier.test_connection()
-            
-            if airtable_success and telegram_success:
-                logger.info("All connections successful")
-                return True
-            else:
-                if not airtable_success:
-                    logger.error("Airtable connection error")
-                if not telegram_success:
-                    logger.error("Telegram connection error")
-                return False
-        except Exception as e:
-            logger.error(f"Connection test error: {e}")
-            return False
+    def run_tact(self):
+        self.tact_count += 1
+        logger.debug(f"Tact #{self.tact_count} - {datetime.now().strftime('%H:%M:%S')}")
+        
+        started = time.monotonic()
+        has_changes = self.run_single_check(self.tact_count)
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self._compact_journal()
+        
+        self._log_tact_summary(has_changes, elapsed_ms)
+        logger.debug(f"Waiting {self.config.POLLING_INTERVAL} seconds until next tact...")
     
-    def start_monitoring(self):
-        if not self.config.POLLING_ENABLED:
-            logger.info("Monitoring disabled in configuration")
-            return
+    def _log_tact_summary(self, has_changes: bool, elapsed_ms: float):
+        # Пустые такты не пишем по одному: одна сводка на LOG_IDLE_SUMMARY_TACTS тактов
+        if not has_changes and not self.is_editing_session:
+            self._idle_tacts += 1
+            self._idle_ms += elapsed_ms
+            if self._idle_tacts < self.config.LOG_IDLE_SUMMARY_TACTS:
+                return
+            logger.info(
+                f"Tacts #{self.tact_count - self._idle_tacts + 1}-#{self.tact_count}: no changes, "
+                f"{len(self.last_servers_data)} servers, avg {self._idle_ms / self._idle_tacts:.0f} ms"
+                + (f", STALE: {', '.join(self.stale_tables)}" if self.stale else "")
+            )
+        else:
+            state = "changes detected" if has_changes else f"editing session, {self.tacts_since_last_change} quiet tacts"
+            logger.info(f"Tact #{self.tact_count}: {state}, {len(self.last_servers_data)} servers, {elapsed_ms:.0f} ms")
         
+        self._idle_tacts = 0
+        self._idle_ms = 0.0
+    
+    def log_startup(self):
         logger.info("Starting Airtable monitoring with separate group files...")
         logger.info(f"Inventory files will be saved to: {self.config.ANSIBLE_INVENTORY_PATH}")
         logger.info(f"Check interval: {self.config.POLLING_INTERVAL} seconds")
         logger.info(f"Alert timeout: {self.config.ALERT_TACTS_TIMEOUT} tacts")
         logger.info("Each server group will be in separate file")
-        logger.info("Change something in Airtable and watch the reaction!")
-        logger.info("=" * 60)
-        
-        tact_count = 0
+    
+    def start_monitoring(self):
+        from src.scheduler import MonitorScheduler
         
-        try:
-            while True:
-                tact_count += 1
-                logger.info(f"Tact #{tact_count} - {datetime.now().strftime('%H:%M:%S')}")
-                
-                self.run_single_check(tact_count)
-                
-                logger.info("-" * 40)
-                logger.info(f"Waiting {self.config.POLLING_INTERVAL} seconds until next tact...")
-                time.sleep(self.config.POLLING_INTERVAL)
-                
-        except KeyboardInterrupt:
-            logger.info("Stop signal received...")
-        except Exception as e:
-            logger.error(f"Critical monitoring error: {e}")
-        finally:
-            logger.info("Monitoring stopped")
\ No newline at end of file
+        MonitorScheduler([self]).run()
@@ -0,0 +1,44 @@
+import asyncio
+import time
+from typing import Dict, Tuple
+from loguru import logger
+
+
+async def _probe(host: str, port: int, timeout: float) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except Exception:
+        # Кроме отказов и таймаутов сюда попадают некорректные адреса (UnicodeError на слишком длинном имени)
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return True
+
+
+async def _probe_all(targets: Dict[str, Tuple[str, int]], timeout: float, concurrency: int) -> Dict[str, bool]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def probe(name: str, host: str, port: int) -> Tuple[str, bool]:
+        async with semaphore:
+            return name, await _probe(host, port, timeout)
+
+    names = list(targets)
+    results = await asyncio.gather(*(probe(name, *targets[name]) for name in names), return_exceptions=True)
+    # Ошибка одной цели не должна срывать проверку остальных
+    return {name: result[1] if isinstance(result, tuple) else False for name, result in zip(names, results)}
+
+
+def probe_hosts(targets: Dict[str, Tuple[str, int]], timeout: float = 2.0, concurrency: int = 200) -> Dict[str, bool]:
+    # Только TCP-соединение с SSH-портом: без рукопожатия и авторизации, общий срок ~ timeout * (N / concurrency)
+    if not targets:
+        return {}
+
+    started = time.monotonic()
+    results = asyncio.run(_probe_all(targets, timeout, concurrency))
+    unreachable = sum(1 for reachable in results.values() if not reachable)
+    logger.info(f"Reachability probe: {len(results) - unreachable}/{len(results)} hosts reachable "
+                f"in {(time.monotonic() - started) * 1000:.0f} ms")
+    return results
@@ -0,0 +1,260 @@
+import heapq
+import signal
+import time
+from typing import Dict, List, Optional
+from loguru import logger
+
+from src.config import Config, file_mtime
+from src.logging_setup import setup_logging
+from src.monitor import AirtableMonitor
+from src.rate_limiter import RateLimiter
+
+
+# Максимальная пауза между проверками сигналов и изменений файлов конфигурации
+WAKEUP_INTERVAL = 0.5
+
+
+class MonitorScheduler:
+
+    def __init__(self, monitors: List[AirtableMonitor], root_config: Optional[Config] = None,
+                 session=None, rate_limiters: Optional[Dict[str, RateLimiter]] = None):
+        self.monitors: Dict[str, AirtableMonitor] = {monitor.config.NAME: monitor for monitor in monitors}
+        self.root_config = root_config
+        self.session = session
+        self.rate_limiters = rate_limiters if rate_limiters is not None else {}
+
+        self._queue = []
+        self._stop_requested = False
+        self._reload_requested = False
+        self._watched_mtimes = self._config_mtimes()
+
+    @classmethod
+    def from_configs(cls, configs: List[Config], root_config: Optional[Config] = None) -> "MonitorScheduler":
+        import requests
+
+        # Одно пулированное соединение на процесс и один бюджет запросов на каждую базу
+        scheduler = cls([], root_config, requests.Session())
+        scheduler._sync_rate_limiters(configs)
+        for config in configs:
+            scheduler._add_monitor(config, len(configs))
+        scheduler._watched_mtimes = scheduler._config_mtimes()
+        return scheduler
+
+    def _sync_rate_limiters(self, configs: List[Config]):
+        rates: Dict[str, List[float]] = {}
+        for config in configs:
+            rates.setdefault(config.AIRTABLE_BASE_ID, []).append(config.AIRTABLE_RATE_LIMIT)
+
+        rate_limiters = {}
+        for base_id, base_rates in rates.items():
+            # Лимит Airtable общий для базы: при расхождении действует самый строгий (0 - без ограничения)
+            limited = [rate for rate in base_rates if rate > 0]
+            rate = min(limited) if limited else 0
+            if len(set(base_rates)) > 1:
+                logger.warning(f"Monitors of base {base_id} set different AIRTABLE_RATE_LIMIT values "
+                               f"{sorted(set(base_rates))}, using {rate:g} req/s for the whole base")
+
+            rate_limiter = self.rate_limiters.get(base_id)
+            if rate_limiter is None or rate_limiter.rate != rate:
+                rate_limiter = RateLimiter(rate)
+            rate_limiters[base_id] = rate_limiter
+        self.rate_limiters = rate_limiters
+
+    def _rate_limiter(self, config: Config) -> RateLimiter:
+        return self.rate_limiters[config.AIRTABLE_BASE_ID]
+
+    def _add_monitor(self, config: Config, monitor_count: int) -> AirtableMonitor:
+        with logger.contextualize(prefix=self._prefix(config, monitor_count)):
+            monitor = AirtableMonitor(config, session=self.session, rate_limiter=self._rate_limiter(config))
+        self.monitors[config.NAME] = monitor
+        return monitor
+
+    @staticmethod
+    def _prefix(config: Config, monitor_count: int) -> str:
+        return f"[{config.NAME}] " if monitor_count > 1 else ""
+
+    def _context(self, monitor: AirtableMonitor):
+        return logger.contextualize(prefix=self._prefix(monitor.config, len(self.monitors)))
+
+    def run_once(self):
+        for monitor in self.monitors.values():
+            with self._context(monitor):
+                if not monitor.acquire_leadership():
+                    logger.info(f"Standby: lease held by {monitor.lease.holder()}, check skipped")
+                    continue
+                logger.info("Running single check...")
+                monitor.run_single_check(1)
+                # Процесс сейчас завершится: хуки запускаются без ожидания debounce
+                monitor.hooks.flush()
+                monitor.release_leadership()
+
+    def _schedule(self, name: str, due: float):
+        heapq.heappush(self._queue, (due, name))
+
+    def _start_monitor(self, monitor: AirtableMonitor, due: float):
+        with self._context(monitor):
+            if not monitor.config.POLLING_ENABLED:
+                logger.info("Monitoring disabled in configuration")
+                return
+            monitor.log_startup()
+        self._schedule(monitor.config.NAME, due)
+
+    def _install_signal_handlers(self):
+        try:
+            signal.signal(signal.SIGTERM, self._handle_stop)
+            if hasattr(signal, 'SIGHUP'):
+                signal.signal(signal.SIGHUP, self._handle_reload)
+        except ValueError:
+            logger.debug("Signal handlers are only available in the main thread")
+
+    def _handle_stop(self, signum, frame):
+        self._stop_requested = True
+
+    def _handle_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _config_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        if self.root_config is None:
+            return mtimes
+        # Файлы представлений и хуков могут быть заданы для отдельных мониторов в MONITORS_FILE
+        configs = [self.root_config] + [monitor.config for monitor in self.monitors.values()]
+        for config in configs:
+            for path in config.watched_files():
+                mtimes[path] = file_mtime(path)
+        return mtimes
+
+    def _config_files_changed(self) -> bool:
+        mtimes = self._config_mtimes()
+        if mtimes != self._watched_mtimes:
+            self._watched_mtimes = mtimes
+            return True
+        return False
+
+    def reload(self):
+        if self.root_config is None:
+            return
+
+        try:
+            root_config = Config()
+            configs = root_config.monitor_configs()
+            for config in configs:
+                config.validate()
+        except Exception as e:
+            logger.error(f"Configuration reload failed, keeping current settings: {e}")
+            return
+
+        if root_config.LOG_LEVEL != self.root_config.LOG_LEVEL or root_config.LOG_FILE != self.root_config.LOG_FILE \
+                or root_config.LOG_FILE_ENABLED != self.root_config.LOG_FILE_ENABLED:
+            setup_logging(root_config, background=True)
+
+        self.root_config = root_config
+        now = time.monotonic()
+
+        self._sync_rate_limiters(configs)
+
+        new_names = {config.NAME for config in configs}
+        for name in list(self.monitors):
+            if name not in new_names:
+                monitor = self.monitors.pop(name)
+                with self._context(monitor):
+                    monitor.release_leadership()
+                    monitor.hooks.shutdown()
+                    logger.info("Monitor removed from configuration")
+
+        for config in configs:
+            monitor = self.monitors.get(config.NAME)
+            if monitor is None:
+                try:
+                    monitor = self._add_monitor(config, len(configs))
+                except Exception as e:
+                    with logger.contextualize(prefix=self._prefix(config, len(configs))):
+                        logger.error(f"Monitor not started, invalid configuration: {e}")
+                    continue
+                self._start_monitor(monitor, now)
+                continue
+
+            was_enabled = monitor.config.POLLING_ENABLED
+            with self._context(monitor):
+                try:
+                    changed = monitor.apply_config(config, self._rate_limiter(config))
+                except Exception as e:
+                    # Ошибка сборки новой конфигурации (файл представлений, хуков, измерения групп) не останавливает процесс
+                    logger.error(f"Configuration reload failed, keeping current settings: {e}")
+                    continue
+
+            if not changed:
+                continue
+            if config.POLLING_ENABLED and not was_enabled:
+                self._start_monitor(monitor, now)
+            elif 'POLLING_INTERVAL' in changed:
+                self._schedule(monitor.config.NAME, now + monitor.next_delay())
+
+        # Удаляем из очереди записи исчезнувших и выключенных мониторов, оставляя ближайший срок для каждого
+        queue = {}
+        for due, name in self._queue:
+            monitor = self.monitors.get(name)
+            if monitor and monitor.config.POLLING_ENABLED:
+                queue[name] = min(due, queue.get(name, due))
+        self._queue = [(due, name) for name, due in queue.items()]
+        heapq.heapify(self._queue)
+
+        # Снимок после применения: в него входят файлы представлений и хуков новых мониторов
+        self._watched_mtimes = self._config_mtimes()
+        logger.info(f"Configuration reloaded: {len(self.monitors)} monitors")
+
+    def run(self):
+        now = time.monotonic()
+        for monitor in list(self.monitors.values()):
+            self._start_monitor(monitor, now)
+
+        if not self._queue:
+            return
+
+        logger.info("Change something in Airtable and watch the reaction!")
+        logger.info("=" * 60)
+
+        self._install_signal_handlers()
+
+        try:
+            while not self._stop_requested:
+                if self._reload_requested or self._config_files_changed():
+                    self._reload_requested = False
+                    self.reload()
+
+                if not self._queue:
+                    time.sleep(WAKEUP_INTERVAL)
+                    continue
+
+                due, name = self._queue[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(min(delay, WAKEUP_INTERVAL))
+                    continue
+
+                heapq.heappop(self._queue)
+                monitor = self.monitors.get(name)
+                if monitor is None:
+                    continue
+
+                with self._context(monitor):
+                    if monitor.acquire_leadership():
+                        monitor.run_tact()
+                    else:
+                        monitor.standby_tact()
+
+                if name in self.monitors and monitor.config.POLLING_ENABLED:
+                    self._schedule(name, time.monotonic() + monitor.next_delay())
+
+            logger.info("Stop signal received, current tact finished")
+
+        except KeyboardInterrupt:
+            logger.info("Stop signal received...")
+        except Exception as e:
+            logger.error(f"Critical monitoring error: {e}")
+        finally:
+            for monitor in self.monitors.values():
+                with self._context(monitor):
+                    monitor.hooks.shutdown()
+                    monitor.release_leadership()
+            logger.info("Monitoring stopped")
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import sys
+from typing import Dict, Iterable, List, Optional
+
+
+# Поля Airtable, которые читают детектор изменений и генераторы inventory
+SERVER_FIELDS = {
+    'Server name': 'name',
+    'Server IP': 'ip',
+    'User': 'user',
+    'Password': 'password',
+    'Status': 'status',
+    'OS Name': 'os_name',
+    'Location': 'location',
+    'Group': 'group',
+    'Host provider': 'host_provider',
+}
+
+# Значения с малым числом вариантов храним в единственном экземпляре
+INTERNED_FIELDS = {'User', 'Status', 'OS Name', 'Location', 'Group', 'Host provider'}
+
+
+class ServerRow:
+
+    __slots__ = ('id',) + tuple(SERVER_FIELDS.values())
+
+    def __init__(self, record_id: Optional[str], **values):
+        self.id = record_id
+        for attr in SERVER_FIELDS.values():
+            setattr(self, attr, values.get(attr))
+
+    @classmethod
+    def from_fields(cls, record_id: Optional[str], fields: Dict) -> "ServerRow":
+        values = {}
+        for field_name, attr in SERVER_FIELDS.items():
+            value = fields.get(field_name)
+            if isinstance(value, str) and field_name in INTERNED_FIELDS:
+                value = sys.intern(value)
+            values[attr] = value
+        return cls(record_id, **values)
+
+    def get(self, field_name: str, default=None):
+        value = getattr(self, SERVER_FIELDS[field_name])
+        return default if value is None else value
+
+    def to_list(self) -> List:
+        return [self.id] + [getattr(self, attr) for attr in SERVER_FIELDS.values()]
+
+    @classmethod
+    def from_list(cls, values: List) -> "ServerRow":
+        fields = {field_name: value for field_name, value in zip(SERVER_FIELDS, values[1:])}
+        return cls.from_fields(values[0], fields)
+
+    def to_record(self) -> Dict:
+        fields = {}
+        for field_name, attr in SERVER_FIELDS.items():
+            value = getattr(self, attr)
+            if value is not None:
+                fields[field_name] = value
+        return {'id': self.id, 'fields': fields}
+
+
+class TableSnapshot:
+
+    __slots__ = ('digest', 'servers', 'record_count', 'digests', 'changed')
+
+    def __init__(self, digest: str, servers: Dict[str, ServerRow], record_count: int,
+                 digests: Optional[Dict[str, bytes]] = None, changed: Optional[Dict[str, Dict]] = None):
+        self.digest = digest
+        self.servers = servers
+        self.record_count = record_count
+        self.digests = digests or {}
+        self.changed = changed or {}
+
+    @staticmethod
+    def combine_digests(digests: Dict[str, bytes]) -> str:
+        data_hash = hashlib.md5()
+        for _, record_digest in sorted(digests.items()):
+            data_hash.update(record_digest)
+        return data_hash.hexdigest()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], known_digests: Optional[Dict[str, bytes]] = None,
+                     previous: Optional["TableSnapshot"] = None) -> "TableSnapshot":
+        digests: Dict[str, bytes] = {}
+        changed = {}
+        servers = {}
+        # Неизмененные записи переиспользуют строки и дайджесты прошлого такта, а не создают копии
+        previous_digests = previous.digests if previous is not None else {}
+        previous_rows = {row.id: row for row in previous.servers.values()} if previous is not None else {}
+
+        for record in records:
+            data_str = json.dumps(record, sort_keys=True, default=str)
+            record_id = record.get('id', '')
+            record_digest = hashlib.md5(data_str.encode()).digest()
+            unchanged = previous_digests.get(record_id) == record_digest
+            digests[record_id] = previous_digests[record_id] if unchanged else record_digest
+
+            fields = record.get('fields', {})
+            # Полные поля держим только для записей, которых нет в зеркале или которые в нем устарели
+            if known_digests is not None and known_digests.get(record_id) != record_digest:
+                changed[record_id] = fields
+
+            server_name = fields.get('Server name', '').strip()
+            if server_name:
+                row = previous_rows.get(record.get('id')) if unchanged else None
+                servers[server_name] = row if row is not None else ServerRow.from_fields(record.get('id'), fields)
+
+        digest = cls.combine_digests(digests)
+        if previous is not None and previous.digest == digest and not changed:
+            # Таблица не менялась: остается единственный экземпляр индекса
+            return previous
+        return cls(digest, servers, len(digests), digests, changed)
+
+
+class SnapshotBuilder:
+
+    def __init__(self):
+        self.tables: Dict[str, TableSnapshot] = {}
+        self.servers: Dict[str, ServerRow] = {}
+        self.stale_tables: List[str] = []
+        self.missing_tables: List[str] = []
+
+    def add_table(self, table_name: str, records: Iterable[Dict],
+                  known_digests: Optional[Dict[str, bytes]] = None,
+                  previous: Optional[TableSnapshot] = None) -> TableSnapshot:
+        # Таблица применяется целиком: при ошибке посреди потока частичные данные отбрасываются
+        table_snapshot = TableSnapshot.from_records(records, known_digests, previous)
+        self.add_snapshot(table_name, table_snapshot)
+        return table_snapshot
+
+    def add_snapshot(self, table_name: str, table_snapshot: TableSnapshot, stale: bool = False):
+        self.tables[table_name] = table_snapshot
+        self.servers.update(table_snapshot.servers)
+        if stale:
+            self.stale_tables.append(table_name)
+
+    def add_missing(self, table_name: str):
+        self.missing_tables.append(table_name)
+
+    @property
+    def record_count(self) -> int:
+        return sum(table.record_count for table in self.tables.values())
+
+    def is_complete(self) -> bool:
+        return not self.missing_tables
+
+    def digest(self) -> str:
+        data_hash = hashlib.md5()
+        for table_name, table_snapshot in self.tables.items():
+            data_hash.update(f"{table_name}:{table_snapshot.digest};".encode())
+        return data_hash.hexdigest()
@@ -1,17 +1,24 @@
-import requests
 from typing import List, Dict, Optional
 from loguru import logger
 
 
 class TelegramNotifier:
     
-    def __init__(self, bot_token: str, chat_id: str, topic_id: Optional[int] = None):
+    def __init__(self, bot_token: str, chat_id: str, topic_id: Optional[int] = None, session=None):
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.topic_id = topic_id
+        self.session = session
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
     
+    @classmethod
+    def from_config(cls, config, session=None) -> "TelegramNotifier":
+        topic_id = int(config.TELEGRAM_TOPIC_ID) if config.TELEGRAM_TOPIC_ID else None
+        return cls(config.TELEGRAM_BOT_TOKEN, config.TELEGRAM_CHAT_ID, topic_id, session=session)
+    
     def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
+        import requests
+        
         try:
             url = f"{self.base_url}/sendMessage"
             
@@ -24,7 +31,7 @@ class TelegramNotifier:
             if self.topic_id is not None:
                 payload["message_thread_id"] = self.topic_id
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = (self.session or requests).post(url, json=payload, timeout=10)
             response.raise_for_status()
             
             logger.info("Telegram message sent successfully")
@@ -59,6 +66,11 @@ class TelegramNotifier:
                     changes_text = ", ".join(fields_changed)
                     message_parts.append(f"   <i>Changed fields: {changes_text}</i>")
             
+            if change.get('reachable') is False:
+                message_parts.append(f"   <b>⚠️ SSH unreachable:</b> {change.get('probe_target', '')}")
+            elif change.get('reachable'):
+                message_parts.append("   ✅ SSH reachable")
+            
             details = change.get('details', {})
             if details:
                 details_text = []
@@ -73,9 +85,11 @@ class TelegramNotifier:
         return "\n".join(message_parts)
     
     def test_connection(self) -> bool:
+        import requests
+        
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url, timeout=10)
+            response = (self.session or requests).get(url, timeout=10)
             response.raise_for_status()
             
             bot_info = response.json()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+from src.config import file_mtime
+from src.host_query import host_matches, parse_predicate
+from src.inventory_generator import InventoryGenerator
+
+
+# Представление по умолчанию повторяет прежний all-vpn-servers.yml
+DEFAULT_VIEWS = [
+    {'name': 'vpn_servers', 'file': 'all-vpn-servers.yml', 'where': ['group=Remnawave-nodes|3X-UI']},
+]
+
+# Файлы групп Airtable, измерений и unreachable оканчиваются на _inventory.yml; у представлений свой суффикс,
+# чтобы представление с именем группы не перезаписало и не удалило ее файл
+GROUP_FILE_SUFFIX = '_inventory.yml'
+VIEW_FILE_SUFFIX = '_view.yml'
+
+# Файлы, записанные представлениями: по списку удаляются файлы представлений, убранных из конфигурации.
+# Расширение не .json/.yml, чтобы Ansible не читал список как inventory
+MANIFEST_FILENAME = '.views.manifest'
+
+
+class View:
+
+    def __init__(self, name: str, filename: str, predicates: List[Tuple[str, str, str]]):
+        self.name = name
+        self.filename = filename
+        self.predicates = predicates
+
+    def matches(self, host_config: Dict) -> bool:
+        return all(host_matches(host_config, *predicate) for predicate in self.predicates)
+
+
+def build_views(entries: List[Dict]) -> List[View]:
+    views = []
+    for index, entry in enumerate(entries):
+        name = entry.get('name') or f"view-{index + 1}"
+        where = entry.get('where') or []
+        if isinstance(where, str):
+            where = [where]
+        views.append(View(name, entry.get('file') or f"{name}{VIEW_FILE_SUFFIX}", [parse_predicate(p) for p in where]))
+
+    names = [view.name for view in views]
+    if len(set(names)) != len(names):
+        raise ValueError(f"View names must be unique: {names}")
+    reserved = {'inventory.yml', MANIFEST_FILENAME}
+    for view in views:
+        if view.filename.endswith(GROUP_FILE_SUFFIX) or view.filename in reserved \
+                or os.path.basename(view.filename) != view.filename:
+            raise ValueError(f"View {view.name}: file {view.filename} collides with group or service files, "
+                             f"use a name without the {GROUP_FILE_SUFFIX} suffix")
+
+    filenames = [view.filename for view in views]
+    if len(set(filenames)) != len(filenames):
+        raise ValueError(f"View files must be unique: {filenames}")
+    return views
+
+
+def load_views(path: Optional[str]) -> List[View]:
+    if not path:
+        return build_views(DEFAULT_VIEWS)
+
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    return build_views(data.get('views', []) if isinstance(data, dict) else data)
+
+
+class ViewEngine:
+
+    def __init__(self, output_path: str, views: List[View], source_mtime: Optional[float] = None):
+        self.output_path = output_path
+        self.views = views
+        # Время изменения VIEWS_FILE, из которого собраны представления
+        self.source_mtime = source_mtime
+        self._digests: Dict[str, str] = {}
+
+    @classmethod
+    def from_config(cls, config) -> "ViewEngine":
+        # Время берется до чтения: правка во время загрузки подхватится следующей перезагрузкой
+        source_mtime = file_mtime(config.VIEWS_FILE)
+        return cls(config.ANSIBLE_INVENTORY_PATH, load_views(config.VIEWS_FILE), source_mtime)
+
+    @staticmethod
+    def _digest(members: Dict[str, Dict]) -> str:
+        data_hash = hashlib.md5()
+        for hostname, host_config in members.items():
+            data_hash.update(repr((hostname, sorted(host_config.items()))).encode())
+        return data_hash.hexdigest()
+
+    def _remove_stale_files(self):
+        manifest_path = os.path.join(self.output_path, MANIFEST_FILENAME)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                recorded = set(json.load(f))
+        except (OSError, ValueError):
+            recorded = set()
+        # Файл представления по умолчанию писали и версии без манифеста
+        owned = recorded | {entry['file'] for entry in DEFAULT_VIEWS}
+
+        filenames = {view.filename for view in self.views}
+        for filename in sorted(owned - filenames):
+            filepath = os.path.join(self.output_path, filename)
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                logger.info(f"Представление с файлом {filename} больше не настроено, файл удален")
+
+        if recorded != filenames:
+            os.makedirs(self.output_path, exist_ok=True)
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(sorted(filenames), f)
+
+    def render(self, hosts: Dict[str, Dict]) -> Dict[str, str]:
+        self._remove_stale_files()
+        if not self.views:
+            return {}
+
+        # Один проход по хостам для всех представлений
+        members = {view.name: {} for view in self.views}
+        for hostname, host_config in hosts.items():
+            for view in self.views:
+                if view.matches(host_config):
+                    members[view.name][hostname] = host_config
+
+        created_files = {}
+        rendered = 0
+        for view in self.views:
+            filepath = os.path.join(self.output_path, view.filename)
+            created_files[view.name] = filepath
+
+            view_members = members[view.name]
+            digest = self._digest(view_members)
+            if self._digests.get(view.name) == digest and os.path.exists(filepath):
+                continue
+
+            if not view_members:
+                logger.warning(f"Представление {view.name}: нет подходящих серверов, проверьте условия {view.predicates}")
+
+            os.makedirs(self.output_path, exist_ok=True)
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(InventoryGenerator.render_group(view_members))
+
+            self._digests[view.name] = digest
+            rendered += 1
+            logger.debug(f"Представление {view.name}: {len(view_members)} серверов -> {filepath}")
+
+        logger.info(f"Представления: {rendered} из {len(self.views)} перегенерированы")
+        return created_files
@@ -0,0 +1,82 @@
+import copy
+
+import pytest
+
+from src.config import Config
+
+
+PAGE_SIZE = 100
+
+
+class FakeResponse:
+
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    # Отвечает как API Airtable: страницы по 100 записей, offset в query string
+
+    def __init__(self):
+        self.tables = {}
+        self.failing = set()
+        # Таблица -> offset, начиная с которого страницы отвечают ошибкой (обрыв посреди выгрузки)
+        self.failing_from = {}
+        self.requests = 0
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.requests += 1
+        path, _, query = url.split('/v0/', 1)[1].partition('?')
+        table_name = path.split('/', 1)[1]
+        offset = int(query.split('=', 1)[1]) if query.startswith('offset=') else 0
+        if table_name in self.failing or offset >= self.failing_from.get(table_name, offset + 1):
+            return FakeResponse({}, 503)
+
+        records = self.tables.get(table_name, [])
+        data = {'records': copy.deepcopy(records[offset:offset + PAGE_SIZE])}
+        if offset + PAGE_SIZE < len(records):
+            data['offset'] = str(offset + PAGE_SIZE)
+        return FakeResponse(data)
+
+
+def make_record(index, **fields):
+    values = {
+        'Server name': f"srv-{index}",
+        'Server IP': f"10.0.0.{index}",
+        'User': 'root',
+        'Status': 'Active',
+        'OS Name': 'Ubuntu 22.04',
+        'Location': 'Germany',
+        'Group': '3X-UI',
+    }
+    values.update(fields)
+    return {'id': f"rec{index:06d}", 'fields': values}
+
+
+@pytest.fixture
+def fake_session():
+    return FakeSession()
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    def factory(**overrides):
+        values = {
+            'AIRTABLE_API_KEY': 'key',
+            'AIRTABLE_BASE_ID': 'base',
+            'AIRTABLE_TABLES': 'T1',
+            'AIRTABLE_RATE_LIMIT': 0,
+            'ANSIBLE_INVENTORY_PATH': str(tmp_path / 'inventory'),
+            'TELEGRAM_ENABLED': False,
+        }
+        values.update(overrides)
+        return Config(values, env={})
+    return factory
@@ -0,0 +1,51 @@
+import pytest
+
+from src import circuit_breaker
+from src.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_opens_after_threshold_and_half_opens_after_delay(clock):
+    breaker = CircuitBreaker(failure_threshold=2, base_delay=5, max_delay=300)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock[0] += 5
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_failed_probe_doubles_delay_up_to_max(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=5, max_delay=30)
+
+    delays = []
+    for _ in range(5):
+        breaker.record_failure()
+        delays.append(breaker.retry_in())
+        clock[0] = breaker.retry_at
+        assert breaker.allow()
+
+    assert delays == [5, 10, 20, 30, 30]
+
+
+def test_success_closes_and_resets_backoff(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=5, max_delay=300)
+    breaker.record_failure()
+    clock[0] = breaker.retry_at
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.retry_in() == 5
@@ -0,0 +1,72 @@
+import dotenv
+import pytest
+
+from src.config import Config
+
+
+def test_keys_edited_in_dotenv_override_process_environment(tmp_path, monkeypatch):
+    dotenv_path = tmp_path / '.env'
+    dotenv_path.write_text("POLLING_INTERVAL=2\nLOG_LEVEL=INFO\n")
+    monkeypatch.setattr(dotenv, 'find_dotenv', lambda *args, **kwargs: str(dotenv_path))
+    monkeypatch.setattr(Config, '_initial_dotenv', None)
+    # Как в docker-compose: те же ключи переданы процессу через environment
+    monkeypatch.setenv('POLLING_INTERVAL', '2')
+    monkeypatch.setenv('LOG_LEVEL', 'WARNING')
+
+    env = Config.load_environment()
+    assert env['POLLING_INTERVAL'] == '2'
+    assert env['LOG_LEVEL'] == 'WARNING'
+
+    dotenv_path.write_text("POLLING_INTERVAL=10\nLOG_LEVEL=INFO\n")
+    env = Config.load_environment()
+    assert env['POLLING_INTERVAL'] == '10'
+    assert env['LOG_LEVEL'] == 'WARNING'
+
+
+def _write_monitors(tmp_path, body):
+    monitors_file = tmp_path / 'monitors.yml'
+    monitors_file.write_text(body)
+    return str(monitors_file)
+
+
+def test_monitors_inheriting_one_mirror_path_are_rejected(tmp_path):
+    monitors_file = _write_monitors(tmp_path, """monitors:
+  - name: a
+    ANSIBLE_INVENTORY_PATH: /srv/a
+  - name: b
+    ANSIBLE_INVENTORY_PATH: /srv/b
+""")
+    config = Config({'MONITORS_FILE': monitors_file}, env={'MIRROR_PATH': '/srv/mirror.sqlite'})
+
+    with pytest.raises(ValueError, match='MIRROR_PATH'):
+        config.monitor_configs()
+
+
+def test_monitors_inheriting_one_journal_path_are_rejected(tmp_path):
+    monitors_file = _write_monitors(tmp_path, """monitors:
+  - name: a
+    ANSIBLE_INVENTORY_PATH: /srv/a
+  - name: b
+    ANSIBLE_INVENTORY_PATH: /srv/b
+""")
+    config = Config({'MONITORS_FILE': monitors_file}, env={'JOURNAL_PATH': '/srv/changes.sqlite'})
+
+    with pytest.raises(ValueError, match='JOURNAL_PATH'):
+        config.monitor_configs()
+
+    assert len(Config({'MONITORS_FILE': monitors_file, 'JOURNAL_ENABLED': False},
+                      env={'JOURNAL_PATH': '/srv/changes.sqlite'}).monitor_configs()) == 2
+
+
+def test_monitors_inheriting_one_lease_path_are_rejected(tmp_path):
+    monitors_file = _write_monitors(tmp_path, """monitors:
+  - name: a
+    ANSIBLE_INVENTORY_PATH: /srv/a
+  - name: b
+    ANSIBLE_INVENTORY_PATH: /srv/b
+""")
+    env = {'HA_LEASE_PATH': '/srv/leader.lease'}
+
+    assert len(Config({'MONITORS_FILE': monitors_file}, env=env).monitor_configs()) == 2
+    with pytest.raises(ValueError, match='HA_LEASE_PATH'):
+        Config({'MONITORS_FILE': monitors_file, 'HA_ENABLED': True}, env=env).monitor_configs()
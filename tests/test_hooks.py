@@ -0,0 +1,84 @@
+import os
+import time
+
+from src.hooks import Hook, HookRunner, merge_change
+
+
+def _change(change_type, diff, **extra):
+    change = {'type': change_type, 'server_name': 'srv-1', 'record_id': 'rec1', 'diff': diff, 'details': {}}
+    if change_type == 'modified':
+        change['fields_changed'] = list(diff)
+    change.update(extra)
+    return change
+
+
+def test_modified_twice_keeps_first_old_and_last_new_per_field():
+    merged = merge_change(
+        _change('modified', {'Server IP': ('1.1.1.1', '2.2.2.2')}),
+        _change('modified', {'Server IP': ('2.2.2.2', '3.3.3.3'), 'Status': ('Active', 'Down')}),
+    )
+
+    assert merged['type'] == 'modified'
+    assert merged['diff'] == {'Server IP': ('1.1.1.1', '3.3.3.3'), 'Status': ('Active', 'Down')}
+    assert merged['fields_changed'] == ['Server IP', 'Status']
+
+
+def test_modified_back_to_original_is_no_change():
+    merged = merge_change(
+        _change('modified', {'Status': ('Active', 'Down')}),
+        _change('modified', {'Status': ('Down', 'Active')}),
+    )
+
+    assert merged is None
+
+
+def test_added_then_modified_stays_added_with_final_values():
+    merged = merge_change(
+        _change('added', {'Server IP': (None, '1.1.1.1'), 'Status': (None, 'Active')}),
+        _change('modified', {'Server IP': ('1.1.1.1', '2.2.2.2')}),
+    )
+
+    assert merged['type'] == 'added'
+    assert merged['diff'] == {'Server IP': (None, '2.2.2.2'), 'Status': (None, 'Active')}
+    assert 'fields_changed' not in merged
+
+
+def test_added_then_removed_cancels_out():
+    assert merge_change(_change('added', {'Status': (None, 'Active')}), _change('removed', {'Status': ('Active', None)})) is None
+
+
+def test_removed_then_added_is_net_modification():
+    merged = merge_change(
+        _change('removed', {'Server IP': ('1.1.1.1', None), 'Location': ('DE', None)}),
+        _change('added', {'Server IP': (None, '2.2.2.2'), 'Location': (None, 'DE'), 'User': (None, 'root')}),
+    )
+
+    assert merged['type'] == 'modified'
+    assert merged['diff'] == {'Server IP': ('1.1.1.1', '2.2.2.2'), 'User': ('', 'root')}
+    assert merged['fields_changed'] == ['Server IP', 'User']
+
+
+def test_modified_then_removed_reports_original_values():
+    merged = merge_change(
+        _change('modified', {'Server IP': ('1.1.1.1', '2.2.2.2')}),
+        _change('removed', {'Server IP': ('2.2.2.2', None), 'Status': ('Active', None)}),
+    )
+
+    assert merged['type'] == 'removed'
+    assert merged['diff'] == {'Server IP': ('1.1.1.1', None), 'Status': ('Active', None)}
+    assert 'fields_changed' not in merged
+
+
+def test_hook_timeout_kills_the_whole_process_group(tmp_path):
+    marker = tmp_path / 'done'
+    # Дочерний shell переживает завершение родительского, если не завершить всю группу
+    hook = Hook('slow', f"sh -c 'sleep 2; touch {marker}'; true", timeout=0.5)
+    runner = HookRunner([hook])
+
+    started = time.monotonic()
+    runner._run_hook(hook, '{}', dict(os.environ))
+    runner.shutdown()
+
+    assert time.monotonic() - started < 1.5
+    time.sleep(2)
+    assert not marker.exists()
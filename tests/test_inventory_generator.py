@@ -0,0 +1,53 @@
+from src.inventory_generator import DIMENSION_GROUPS_FILENAME, InventoryGenerator
+
+
+HOSTS = {
+    'srv-1': {'ansible_host': '10.0.0.1', 'location': 'Germany', 'status': 'Active'},
+    'srv-2': {'ansible_host': '10.0.0.2', 'location': 'Finland', 'status': 'New'},
+}
+
+
+def test_dimension_groups_file_removed_when_dimensions_disabled(tmp_path):
+    filepath = InventoryGenerator(str(tmp_path), group_dimensions=['location']).generate_dimension_groups(HOSTS)
+    assert filepath == str(tmp_path / DIMENSION_GROUPS_FILENAME)
+    assert (tmp_path / DIMENSION_GROUPS_FILENAME).exists()
+
+    assert InventoryGenerator(str(tmp_path)).generate_dimension_groups(HOSTS) is None
+    assert not (tmp_path / DIMENSION_GROUPS_FILENAME).exists()
+
+
+def test_values_without_latin_name_are_skipped_not_merged(tmp_path):
+    hosts = {
+        'srv-1': {'ansible_host': '10.0.0.1', 'status': 'Новый'},
+        'srv-2': {'ansible_host': '10.0.0.2', 'status': 'Активен'},
+        'srv-3': {'ansible_host': '10.0.0.3', 'status': 'Active'},
+    }
+
+    index = InventoryGenerator(str(tmp_path), group_dimensions=['status']).build_dimension_index(hosts)
+
+    assert index == {'status_active': ['srv-3']}
+
+
+def test_values_sanitized_to_one_group_name_are_not_merged(tmp_path):
+    hosts = {
+        'srv-1': {'ansible_host': '10.0.0.1', 'os_name': 'Ubuntu 22.04'},
+        'srv-2': {'ansible_host': '10.0.0.2', 'os_name': 'Ubuntu-22.04'},
+        'srv-3': {'ansible_host': '10.0.0.3', 'os_name': 'Ubuntu 22.04'},
+    }
+
+    index = InventoryGenerator(str(tmp_path), group_dimensions=['os_name']).build_dimension_index(hosts)
+
+    assert index == {'os_ubuntu_22_04': ['srv-1', 'srv-3']}
+
+
+def test_save_inventory_renders_like_group_files(tmp_path):
+    hosts = {
+        'srv-12': {'ansible_host': '10.0.0.12', 'location': 'DE'},
+        'srv-3': {'ansible_host': '10.0.0.3', 'location': 'Big Island'},
+    }
+    generator = InventoryGenerator(str(tmp_path))
+
+    filepath = generator.save_inventory({'all': {'children': {'servers': {'hosts': hosts}}}})
+
+    with open(filepath, encoding='utf-8') as f:
+        assert f.read() == InventoryGenerator.render_group(hosts)
@@ -0,0 +1,36 @@
+import sqlite3
+import time
+
+from src.journal import ChangeJournal
+
+
+CHANGE = {'type': 'modified', 'server_name': 'srv-1', 'record_id': 'rec1',
+          'diff': {'Status': ('Active', 'Down')}, 'details': {'Group': 'Web'}}
+
+
+def test_idle_journal_is_compacted_without_new_entries(tmp_path):
+    path = str(tmp_path / 'journal.sqlite')
+    journal = ChangeJournal(path, retention_days=1, compact_interval=3600)
+    journal.append([CHANGE])
+    journal.append([CHANGE], ts=time.time() - 2 * 86400)
+
+    # Интервал очистки еще не прошел
+    assert journal.maybe_compact() == 0
+    assert len(journal.query()) == 2
+    journal.close()
+
+    idle = ChangeJournal(path, retention_days=1, compact_interval=3600)
+    assert idle.maybe_compact() == 1
+    assert len(idle.query()) == 1
+    idle.close()
+
+
+def test_journal_does_not_use_wal(tmp_path):
+    path = str(tmp_path / 'journal.sqlite')
+    journal = ChangeJournal(path)
+    journal.append([CHANGE])
+    journal.close()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+    conn.close()
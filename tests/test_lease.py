@@ -0,0 +1,40 @@
+from src import lease as lease_module
+from src.lease import LeaseLock
+
+
+def test_nodes_exclude_each_other_until_ttl_expires(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lease_module.time, 'time', lambda: now[0])
+    path = str(tmp_path / 'leader.lease')
+    first = LeaseLock(path, 'node-1', ttl=15)
+    second = LeaseLock(path, 'node-2', ttl=15)
+
+    assert first.acquire()
+    assert not second.acquire()
+    assert second.holder() == 'node-1'
+
+    # Лидер продлевает аренду: резерв ее не получает
+    now[0] += 10
+    assert first.acquire()
+    now[0] += 10
+    assert not second.acquire()
+
+    # Лидер перестал продлевать: после TTL аренду забирает резерв
+    now[0] += 15
+    assert second.acquire()
+    assert not first.acquire()
+    assert first.holder() == 'node-2'
+
+
+def test_release_frees_lease_only_for_holder(tmp_path):
+    path = str(tmp_path / 'leader.lease')
+    first = LeaseLock(path, 'node-1', ttl=15)
+    second = LeaseLock(path, 'node-2', ttl=15)
+    assert first.acquire()
+
+    second.release()
+    assert first.holder() == 'node-1'
+
+    first.release()
+    assert first.holder() is None
+    assert second.acquire()
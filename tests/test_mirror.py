@@ -0,0 +1,62 @@
+from conftest import make_record
+from src.mirror import InventoryMirror
+from src.monitor import AirtableMonitor
+from src.snapshot import TableSnapshot
+
+
+def _save(mirror, records, state=None):
+    table_snapshot = TableSnapshot.from_records(records, mirror.digests('T1'))
+    return mirror.save({'T1': table_snapshot}, state or {}), table_snapshot
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'mirror.sqlite')
+    records = [make_record(i) for i in range(3)]
+    mirror = InventoryMirror(path, ['Status', 'Notes'])
+    written, table_snapshot = _save(mirror, records, {'hash': 'abc', 'pending_changes': [{'server_name': 'srv-1'}]})
+    mirror.close()
+    assert written == 3
+
+    restored = InventoryMirror(path)
+    tables = restored.load_tables(['T1', 'T2'])
+    assert list(tables) == ['T1']
+    assert tables['T1'].digest == table_snapshot.digest
+    assert {name: row.ip for name, row in tables['T1'].servers.items()} == {
+        'srv-0': '10.0.0.0', 'srv-1': '10.0.0.1', 'srv-2': '10.0.0.2'
+    }
+    assert restored.load_state() == {'hash': 'abc', 'pending_changes': [{'server_name': 'srv-1'}]}
+    restored.close()
+
+
+def test_only_changed_records_are_written_and_vanished_ones_deleted(tmp_path):
+    mirror = InventoryMirror(str(tmp_path / 'mirror.sqlite'))
+    records = [make_record(i) for i in range(5)]
+    _save(mirror, records)
+
+    records[1]['fields']['Status'] = 'Down'
+    del records[3]
+    written, table_snapshot = _save(mirror, records)
+
+    assert written == 2
+    assert table_snapshot.changed == {}
+    assert _save(mirror, records)[0] == 0
+
+    servers = InventoryMirror(mirror.path).load_servers(['T1'])
+    assert sorted(servers) == ['srv-0', 'srv-1', 'srv-2', 'srv-4']
+    assert servers['srv-1'].status == 'Down'
+    mirror.close()
+
+
+def test_restart_restores_published_hash(make_config, fake_session):
+    fake_session.tables['T1'] = [make_record(i) for i in range(3)]
+    config = make_config(JOURNAL_ENABLED=False)
+    monitor = AirtableMonitor(config, session=fake_session)
+    monitor.run_single_check(1)
+    assert monitor.published_hash == monitor.last_data_hash is not None
+
+    restarted = AirtableMonitor(config, session=fake_session)
+
+    assert restarted.last_data_hash == monitor.last_data_hash
+    assert restarted.published_hash == monitor.published_hash
+    assert sorted(restarted.last_servers_data) == ['srv-0', 'srv-1', 'srv-2']
+    assert not restarted.run_single_check(1)
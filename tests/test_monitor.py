@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+from conftest import make_record
+from src.monitor import AirtableMonitor
+
+
+def test_invalid_reload_keeps_previous_configuration(make_config, fake_session):
+    config = make_config(INVENTORY_GROUP_DIMENSIONS='location')
+    monitor = AirtableMonitor(config, session=fake_session)
+    inventory_gen, hooks = monitor.inventory_gen, monitor.hooks
+
+    with pytest.raises(ValueError):
+        monitor.apply_config(make_config(INVENTORY_GROUP_DIMENSIONS='bogus', HOOKS_FILE='/nonexistent/hooks.yml'))
+
+    assert monitor.config is config
+    assert monitor.inventory_gen is inventory_gen
+    assert monitor.hooks is hooks
+
+
+def test_valid_reload_rebuilds_only_changed_parts(make_config, fake_session):
+    monitor = AirtableMonitor(make_config(), session=fake_session)
+    airtable, journal = monitor.airtable, monitor.journal
+
+    changed = monitor.apply_config(make_config(INVENTORY_GROUP_DIMENSIONS='location'))
+
+    assert changed == ['INVENTORY_GROUP_DIMENSIONS']
+    assert monitor.inventory_gen.group_dimensions == ['location']
+    assert monitor.airtable is airtable
+    assert monitor.journal is journal
+
+
+def test_edited_views_file_is_reloaded_with_the_same_path(make_config, fake_session, tmp_path):
+    views_file = tmp_path / 'views.yml'
+    views_file.write_text("views:\n  - {name: active, file: active.yml, where: [status=Active]}\n")
+    monitor = AirtableMonitor(make_config(VIEWS_FILE=str(views_file)), session=fake_session)
+    assert monitor.apply_config(make_config(VIEWS_FILE=str(views_file))) == []
+
+    views_file.write_text("views:\n  - {name: new, file: new.yml, where: [status=New]}\n")
+    os.utime(views_file, (time.time() + 5, time.time() + 5))
+
+    assert monitor.apply_config(make_config(VIEWS_FILE=str(views_file))) == ['VIEWS_FILE']
+    assert [view.name for view in monitor.views.views] == ['new']
+
+
+def test_edited_hooks_file_is_reloaded_and_keeps_pending_changes(make_config, fake_session, tmp_path):
+    hooks_file = tmp_path / 'hooks.yml'
+    hooks_file.write_text("hooks:\n  - {name: first, command: 'true'}\n")
+    config = make_config(HOOKS_FILE=str(hooks_file), HOOKS_DEBOUNCE_SECONDS=60)
+    monitor = AirtableMonitor(config, session=fake_session)
+    monitor.hooks.submit([{'type': 'added', 'server_name': 'srv-1', 'diff': {}}])
+
+    hooks_file.write_text("hooks:\n  - {name: second, command: 'true'}\n")
+    os.utime(hooks_file, (time.time() + 5, time.time() + 5))
+
+    assert monitor.apply_config(make_config(HOOKS_FILE=str(hooks_file), HOOKS_DEBOUNCE_SECONDS=60)) == ['HOOKS_FILE']
+    assert [hook.name for hook in monitor.hooks.hooks] == ['second']
+    assert [change['server_name'] for change in monitor.hooks.take_pending()] == ['srv-1']
+    monitor.hooks.shutdown()
+
+
+def _two_table_monitor(make_config, fake_session):
+    fake_session.tables['T1'] = [make_record(i) for i in range(3)]
+    fake_session.tables['T2'] = [make_record(i, Group='Web') for i in range(100, 250)]
+    config = make_config(AIRTABLE_TABLES='T1,T2', CIRCUIT_BACKOFF_BASE=0, JOURNAL_ENABLED=False)
+    monitor = AirtableMonitor(config, session=fake_session)
+    assert monitor.check_for_changes(1)
+    return monitor
+
+
+@pytest.mark.parametrize('failure', ['whole_table', 'second_page'])
+def test_failed_fetch_is_not_a_change_and_serves_last_known_good(make_config, fake_session, failure):
+    monitor = _two_table_monitor(make_config, fake_session)
+    data_hash, servers = monitor.last_data_hash, monitor.last_servers_data
+    if failure == 'whole_table':
+        fake_session.failing.add('T2')
+    else:
+        fake_session.failing_from['T2'] = 100
+
+    assert not monitor.check_for_changes(2)
+
+    assert monitor.stale and monitor.stale_tables == ['T2']
+    assert monitor.last_data_hash == data_hash
+    assert monitor.last_servers_data is servers and len(servers) == 153
+    assert monitor.pending_changes == []
+
+    # Источник вернулся: данные снова свежие, изменений нет
+    fake_session.failing.clear()
+    fake_session.failing_from.clear()
+    assert not monitor.check_for_changes(3)
+    assert not monitor.stale and monitor.stale_tables == []
+
+
+def test_changes_in_healthy_table_are_detected_while_another_is_stale(make_config, fake_session):
+    monitor = _two_table_monitor(make_config, fake_session)
+    fake_session.failing.add('T2')
+    fake_session.tables['T1'][0]['fields']['Status'] = 'Down'
+
+    assert monitor.check_for_changes(2)
+
+    assert monitor.stale_tables == ['T2']
+    assert [(change['type'], change['server_name']) for change in monitor.pending_changes] == [('modified', 'srv-0')]
+    assert len(monitor.last_servers_data) == 153
+
+
+def test_startup_without_last_known_good_skips_check(make_config, fake_session):
+    fake_session.tables['T1'] = [make_record(i) for i in range(3)]
+    fake_session.failing.add('T2')
+    monitor = AirtableMonitor(make_config(AIRTABLE_TABLES='T1,T2', JOURNAL_ENABLED=False), session=fake_session)
+
+    assert not monitor.check_for_changes(1)
+
+    assert monitor.last_data_hash is None
+    assert monitor.last_servers_data == {}
+    assert monitor.stale_tables == ['T2']
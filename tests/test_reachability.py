@@ -0,0 +1,56 @@
+import socket
+
+from src.reachability import probe_hosts
+
+
+def _listening_socket():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    return server
+
+
+def _refused_port():
+    # Порт, который был свободен и никем не слушается
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_reachable_and_refused_targets():
+    server = _listening_socket()
+    try:
+        results = probe_hosts({
+            'open': ('127.0.0.1', server.getsockname()[1]),
+            'closed': ('127.0.0.1', _refused_port()),
+        }, timeout=1.0)
+    finally:
+        server.close()
+
+    assert results == {'open': True, 'closed': False}
+
+
+def test_invalid_address_is_unreachable_and_does_not_abort_others():
+    server = _listening_socket()
+    try:
+        results = probe_hosts({
+            'bad': ('a' * 70 + '.example', 22),
+            'open': ('127.0.0.1', server.getsockname()[1]),
+        }, timeout=1.0)
+    finally:
+        server.close()
+
+    assert results == {'bad': False, 'open': True}
+
+
+def test_concurrency_limit_probes_every_target():
+    server = _listening_socket()
+    port = server.getsockname()[1]
+    try:
+        results = probe_hosts({f'h{i}': ('127.0.0.1', port) for i in range(10)}, timeout=1.0, concurrency=2)
+    finally:
+        server.close()
+
+    assert len(results) == 10 and all(results.values())
@@ -0,0 +1,27 @@
+from src.config import Config
+from src.scheduler import MonitorScheduler
+
+
+def _config(name, base_id, rate):
+    return Config({'NAME': name, 'AIRTABLE_BASE_ID': base_id, 'AIRTABLE_RATE_LIMIT': rate}, env={})
+
+
+def test_monitors_of_one_base_share_the_strictest_limiter():
+    scheduler = MonitorScheduler([])
+    configs = [_config('a', 'base1', 5), _config('b', 'base1', 2), _config('c', 'base2', 5)]
+    scheduler._sync_rate_limiters(configs)
+
+    assert scheduler._rate_limiter(configs[0]) is scheduler._rate_limiter(configs[1])
+    assert scheduler._rate_limiter(configs[0]).rate == 2
+    assert scheduler._rate_limiter(configs[2]).rate == 5
+
+
+def test_reload_keeps_limiter_when_base_rate_is_unchanged():
+    scheduler = MonitorScheduler([])
+    scheduler._sync_rate_limiters([_config('a', 'base1', 5), _config('b', 'base2', 5)])
+    kept = scheduler.rate_limiters['base1']
+
+    scheduler._sync_rate_limiters([_config('a', 'base1', 5), _config('b', 'base1', 0)])
+
+    assert scheduler.rate_limiters['base1'] is kept
+    assert set(scheduler.rate_limiters) == {'base1'}
@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+from src.views import MANIFEST_FILENAME, ViewEngine, build_views
+
+
+HOSTS = {
+    'srv-1': {'ansible_host': '10.0.0.1', 'group': '3X-UI', 'status': 'Active'},
+    'srv-2': {'ansible_host': '10.0.0.2', 'group': 'Web', 'status': 'New'},
+}
+
+
+def test_duplicate_view_names_are_rejected():
+    with pytest.raises(ValueError):
+        build_views([
+            {'name': 'vpn', 'file': 'a.yml', 'where': ['group=3X-UI']},
+            {'name': 'vpn', 'file': 'b.yml', 'where': ['group=Web']},
+        ])
+
+
+def test_files_of_removed_views_are_deleted(tmp_path):
+    output_path = str(tmp_path)
+    # Файл представления по умолчанию, оставшийся от прежней версии
+    (tmp_path / 'all-vpn-servers.yml').write_text('---\n')
+
+    ViewEngine(output_path, build_views([
+        {'name': 'active', 'file': 'active.yml', 'where': ['status=Active']},
+        {'name': 'new', 'file': 'new.yml', 'where': ['status=New']},
+    ])).render(HOSTS)
+    assert not (tmp_path / 'all-vpn-servers.yml').exists()
+    assert json.loads((tmp_path / MANIFEST_FILENAME).read_text()) == ['active.yml', 'new.yml']
+
+    created = ViewEngine(output_path, build_views([
+        {'name': 'active', 'file': 'active.yml', 'where': ['status=Active']},
+    ])).render(HOSTS)
+    assert created == {'active': os.path.join(output_path, 'active.yml')}
+    assert (tmp_path / 'active.yml').exists()
+    assert not (tmp_path / 'new.yml').exists()
+
+    ViewEngine(output_path, []).render(HOSTS)
+    assert not (tmp_path / 'active.yml').exists()
+
+
+def test_view_files_stay_out_of_the_group_file_namespace():
+    view, = build_views([{'name': 'unreachable', 'where': ['status=Active']}])
+    assert view.filename == 'unreachable_view.yml'
+
+    for filename in ('Web_inventory.yml', 'dimension_groups_inventory.yml', 'inventory.yml', '../web.yml'):
+        with pytest.raises(ValueError):
+            build_views([{'name': 'web', 'file': filename, 'where': ['group=Web']}])